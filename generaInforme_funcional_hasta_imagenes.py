@@ -5,20 +5,48 @@
 # Se puede ejecutar para TODOS los .txt en la carpeta o para uno solo:
 #   py crear_informe.py                     -> procesa todos los txt
 #   py crear_informe.py "Mi chat.txt"      -> procesa sólo ese archivo
+#   py crear_informe.py --workers 8         -> transcribe audios con 8 hilos
+#   py crear_informe.py --incremental       -> solo lee lo nuevo de cada chat
+#   py crear_informe.py --paralelo 8        -> procesa 8 chats a la vez (un proceso por chat)
+#   py crear_informe.py --desde 2025-03-01 --hasta 2025-03-31  -> solo ese rango de fechas
+#   py crear_informe.py --perfil            -> tiempos por etapa + traza perfil_informe.json
+#   py crear_informe.py --libro informe_sedes.xlsx  -> un solo libro: consolidado + una hoja por chat
+#   py crear_informe.py --registros ../registros --formato-registros parquet  -> registros para BI
+#   py crear_informe.py --asincrono --concurrencia decodificacion=8,reconocimiento=2
+#   py crear_informe.py --clasificador tokens   -> clasificación por palabras completas
+#   py crear_informe.py --deduplicar        -> no contar dos veces mensajes de exportaciones solapadas
+#   py crear_informe.py --sin-vad           -> reconocer cada audio entero, sin recortar silencios
+#   py crear_informe.py --vigilar           -> tras procesar todo, reprocesa solo los chats que cambian
+#   py crear_informe.py --solo-texto        -> sin transcripción ni OCR (adjuntos pendientes)
+#   py crear_informe.py --cprofile bucle.pstats --debug
+# Las etapas pesadas (audio, imágenes, Excel) importan sus módulos la primera vez que se usan.
 # ===============================
 
 import os
-import re
 import sys
-import pandas as pd
+import time
+import logging
+import argparse
+import importlib.util
 from pathlib import Path
-from datetime import datetime
+from datetime import date
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# Importar módulos auxiliares
-from transcribir import transcribir_audio
-from clasificar import clasificar_soporte, tipos_soporte
-from generar_excel import generar_excel
-from procesar_imagenes import extraer_texto_imagen, analizar_visualmente
+# Importar módulos auxiliares (livianos; transcribir, procesar_imagenes, pipeline_async
+# y generar_excel se importan en la etapa que los usa)
+from clasificar import clasificar_soporte, tipos_soporte, usar_clasificador, MOTORES as CLASIFICADORES
+from exportar_registros import ExportadorRegistros, FORMATOS
+from pipeline_audios import prescan_adjuntos, transcribir_en_paralelo
+from parser_chat import iterar_mensajes, buscar_offset_fecha
+from estado_incremental import EstadoIncremental, CARPETA_ESTADO
+from huellas_mensajes import HuellasMensajes
+from indice_adjuntos import obtener_indice
+from vigilar_carpeta import VigilanteCarpeta, ESPERA
+from agregador import AgregadorSoportes
+from instrumentacion import perfil, configurar_log
+
+log = logging.getLogger("informe")
 
 # -------------------------------
 # Configuración de rutas y formatos
@@ -27,7 +55,6 @@ RUTA_CHATS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "chat
 RUTA_AUDIOS = RUTA_CHATS   # donde están tus PTT-*.opus
 RUTA_IMAGENES = RUTA_CHATS # donde están tus IMG-*.jpg o png
 RUTA_TRANSCRIPCIONES = Path("transcripciones")
-RUTA_TRANSCRIPCIONES.mkdir(exist_ok=True)
 
 # Traducción de meses inglés → español
 meses_map = {
@@ -37,140 +64,625 @@ meses_map = {
     "October": "Octubre", "November": "Noviembre", "December": "Diciembre"
 }
 
-# Regex para audios e imágenes
-regex_audio = re.compile(r"PTT-(\d{8})-WA\d+\.opus", re.IGNORECASE)
-regex_imagen = re.compile(r"IMG-(\d{8})-WA\d+\.(jpg|png|jpeg)", re.IGNORECASE)
+# Por defecto solo se cuentan mensajes de este año en adelante (ver --desde)
+ANIO_MINIMO = 2025
+
+# En modo incremental se guarda un checkpoint cada N mensajes procesados
+CHECKPOINT_CADA = 500
 
 # -------------------------------
 # Lista de archivos a procesar (soporta argumento opcional para un solo chat)
 # -------------------------------
-if len(sys.argv) > 1:
-    # El usuario indicó un archivo concreto (puede ser nombre o ruta)
-    arg = sys.argv[1]
-    # Si el argumento apunta a la ruta completa, úsala; si no, asume que está dentro de RUTA_CHATS
-    if os.path.isabs(arg) or os.path.exists(arg):
-        archivos_a_procesar = [arg]
-    else:
-        archivos_a_procesar = [os.path.join(RUTA_CHATS, arg)]
-else:
+def listar_chats(arg=None) -> list:
+    """
+    Devuelve las rutas de los chats a procesar: el indicado o todos los .txt.
+    """
+    if arg:
+        # El usuario indicó un archivo concreto (puede ser nombre o ruta)
+        # Si el argumento apunta a la ruta completa, úsala; si no, asume que está dentro de RUTA_CHATS
+        if os.path.isabs(arg) or os.path.exists(arg):
+            return [arg]
+        return [os.path.join(RUTA_CHATS, arg)]
     # Procesar todos los .txt en la carpeta
-    archivos_a_procesar = [
+    return [
         os.path.join(RUTA_CHATS, f) for f in os.listdir(RUTA_CHATS) if f.lower().endswith(".txt")
     ]
 
-if not archivos_a_procesar:
-    print("⚠️ No se encontraron archivos .txt en la carpeta de chats.")
-    sys.exit(0)
+
+def mensajes_del_periodo(ruta_txt: str, desde_offset: int = 0, desde: date = None, hasta: date = None):
+    """
+    Mensajes del chat (ya unidos los de varias líneas) entre `desde` y `hasta`.
+    Salta por búsqueda binaria al primer mensaje >= `desde` y deja de leer
+    al pasar `hasta`, así solo se recorre la ventana pedida.
+    """
+    desde = desde or date(ANIO_MINIMO, 1, 1)
+    inicio = max(desde_offset, buscar_offset_fecha(ruta_txt, desde))
+    for msg in perfil.iterar("parseo", iterar_mensajes(ruta_txt, inicio), lambda m: len(m.cuerpo)):
+        if hasta is not None and msg.fecha > hasta:
+            break
+        if msg.fecha >= desde:
+            yield msg
+
 
 # -------------------------------
-# Procesar cada chat por separado (reseteando resultados por chat)
+# Procesar un chat (mantiene el orden real de la conversación)
 # -------------------------------
-for ruta_txt in archivos_a_procesar:
-    if not os.path.exists(ruta_txt):
-        print(f"[ERROR] No existe el archivo: {ruta_txt}")
-        continue
-
-    nombre_txt = os.path.basename(ruta_txt)
-    print(f"\n[DEBUG] Iniciando procesamiento del chat: {nombre_txt}")
-
-    resultados = []  # <-- reiniciar para cada chat
-
-    with open(ruta_txt, "r", encoding="utf-8") as f:
-        for linea in f:
-            # Intentar extraer la fecha (si no puede, se salta la línea)
-            try:
-                fecha = datetime.strptime(linea.split(",")[0], "%d/%m/%Y").date()
-            except Exception:
-                continue
+def clasificar_mensaje(msg, texto: str = None, encontrado: bool = True):
+    """
+    Devuelve (soporte, texto con que se clasificó) para un mensaje.
+    `texto` es la transcripción u OCR del adjunto y `encontrado` indica si el
+    adjunto está en la carpeta. Los mensajes del equipo de soporte no se
+    cuentan: devuelven (None, None).
+    """
+    # --- Caso 1: Audio ---
+    if msg.adjunto == "audio":
+        nombre_audio = msg.nombre_adjunto
+        if not encontrado:
+            log.warning("Audio no encontrado: %s", nombre_audio)
+            return "Adjunto (pendiente clasificar)", ""
 
-            if fecha.year < 2025:
-                continue
+        log.debug("Transcripción en orden: %s", nombre_audio)
+        transcripcion = texto or ""
 
-            texto_linea = linea.strip().lower()
-
-            # --- Caso 1: Audio ---
-            m_audio = regex_audio.search(linea)
-            if m_audio:
-                nombre_audio = m_audio.group(0)
-                ruta_audio = os.path.join(RUTA_AUDIOS, nombre_audio)
-                if os.path.exists(ruta_audio):
-                    print(f"[DEBUG] Transcribiendo audio en orden: {nombre_audio}")
-                    transcripcion = transcribir_audio(ruta_audio)
-
-                    # Guardar transcripción
-                    archivo_txt_trans = RUTA_TRANSCRIPCIONES / f"{Path(nombre_audio).stem}.txt"
-                    with open(archivo_txt_trans, "w", encoding="utf-8") as ft:
-                        ft.write(transcripcion)
-
-                    soporte = clasificar_soporte(transcripcion) or "Adjunto (pendiente clasificar)"
-                else:
-                    print(f"[ADVERTENCIA] Audio no encontrado: {nombre_audio}")
-                    soporte = "Adjunto (pendiente clasificar)"
-
-                resultados.append({
-                    "Fecha": fecha,
-                    "Mes": meses_map.get(fecha.strftime("%B"), fecha.strftime("%B")),
-                    "Año": fecha.year,
-                    "Tipo de Soporte": soporte
-                })
-                continue
+        # Guardar transcripción
+        RUTA_TRANSCRIPCIONES.mkdir(exist_ok=True)
+        archivo_txt_trans = RUTA_TRANSCRIPCIONES / f"{Path(nombre_audio).stem}.txt"
+        with open(archivo_txt_trans, "w", encoding="utf-8") as ft:
+            ft.write(transcripcion)
 
-            # --- Caso 2: Imagen ---
-            m_imagen = regex_imagen.search(linea)
-            if m_imagen:
-                nombre_imagen = m_imagen.group(0)
-                ruta_imagen = os.path.join(RUTA_IMAGENES, nombre_imagen)
-                if os.path.exists(ruta_imagen):
-                    print(f"\n[DEBUG] Procesando imagen en orden: {nombre_imagen}")
-                    texto_img = extraer_texto_imagen(ruta_imagen)
-
-                    if texto_img:
-                        soporte = clasificar_soporte(texto_img)
-                        print(f"[OCR] Texto detectado en {nombre_imagen}: {texto_img[:100]}...")
-                    else:
-                        soporte = analizar_visualmente(ruta_imagen)
-                        print(f"[VISUAL] No se detectó texto en {nombre_imagen}, clasificado por análisis visual.")
-
-                    if not soporte:
-                        soporte = "Imagen (pendiente clasificar)"
-                else:
-                    print(f"[ADVERTENCIA] Imagen no encontrada: {nombre_imagen}")
-                    soporte = "Imagen no encontrada"
-
-                print(f"[RESULTADO] {nombre_imagen} → {soporte}\n")
-
-                resultados.append({
-                    "Fecha": fecha,
-                    "Mes": meses_map.get(fecha.strftime("%B"), fecha.strftime("%B")),
-                    "Año": fecha.year,
-                    "Tipo de Soporte": soporte
-                })
-                continue
+        return clasificar_soporte(transcripcion) or "Adjunto (pendiente clasificar)", transcripcion
+
+    # --- Caso 2: Imagen ---
+    if msg.adjunto == "imagen":
+        nombre_imagen = msg.nombre_adjunto
+        ruta_imagen = os.path.join(RUTA_IMAGENES, nombre_imagen)
+        texto_img = texto or ""
+        if encontrado:
+            log.debug("Procesando imagen en orden: %s", nombre_imagen)
+
+            if texto_img:
+                soporte = clasificar_soporte(texto_img)
+                log.debug("[OCR] Texto detectado en %s: %.100s...", nombre_imagen, texto_img)
+            else:
+                from procesar_imagenes import analizar_visualmente
+                soporte = analizar_visualmente(ruta_imagen)
+                log.debug("[VISUAL] No se detectó texto en %s, clasificado por análisis visual.", nombre_imagen)
+
+            if not soporte:
+                soporte = "Imagen (pendiente clasificar)"
+        else:
+            log.warning("Imagen no encontrada: %s", nombre_imagen)
+            soporte = "Imagen no encontrada"
+
+        log.debug("[RESULTADO] %s → %s", nombre_imagen, soporte)
+        return soporte, texto_img
+
+    # --- Caso 3: Mensaje de texto (solo del cliente) ---
+    if msg.es_de_soporte:
+        return None, None
+    return clasificar_soporte(msg.cuerpo) or "Adjunto (pendiente clasificar)", msg.cuerpo
+
+
+def clasificar_solo_texto(msg):
+    """
+    Como clasificar_mensaje pero sin abrir los adjuntos (--solo-texto):
+    audios e imágenes se cuentan como pendientes de clasificar.
+    """
+    if msg.adjunto == "audio":
+        return "Adjunto (pendiente clasificar)", ""
+    if msg.adjunto == "imagen":
+        return "Imagen (pendiente clasificar)", ""
+    return clasificar_mensaje(msg)
+
+
+class ConteoChat:
+    """
+    Recibe los mensajes ya clasificados en el orden de la conversación:
+    los agrega, los exporta y guarda checkpoints del modo incremental.
+    """
+
+    def __init__(self, ruta_txt: str, agregado: AgregadorSoportes,
+                 estado: EstadoIncremental = None, registros: ExportadorRegistros = None):
+        self.ruta_txt = ruta_txt
+        self.agregado = agregado
+        self.estado = estado
+        self.registros = registros
+        self.pendientes = 0
+        self.ultimo = None
+
+    def __call__(self, msg, soporte, texto):
+        # Checkpoint: todo lo anterior a este mensaje ya está contado (y exportado:
+        # con Parquet solo cuando el exportador acaba de cerrar un archivo)
+        if self.estado is not None and self.pendientes >= CHECKPOINT_CADA:
+            marca = self.registros.volcar() if self.registros is not None else None
+            if self.registros is None or marca is not None:
+                self.estado.actualizar(self.ruta_txt, msg.offset, self.ultimo, self.agregado, marca)
+                self.pendientes = 0
+        self.pendientes += 1
+        self.ultimo = f"{msg.fecha.isoformat()} {msg.hora or ''}".strip()
 
-            # --- Caso 3: Mensaje de texto (solo del cliente) ---
-            if " - soporte donucol:" not in linea:
-                soporte = clasificar_soporte(texto_linea) or "Adjunto (pendiente clasificar)"
-                resultados.append({
-                    "Fecha": fecha,
-                    "Mes": meses_map.get(fecha.strftime("%B"), fecha.strftime("%B")),
-                    "Año": fecha.year,
-                    "Tipo de Soporte": soporte
-                })
+        if soporte is None:
+            return
+        self.agregado.agregar(soporte, msg.fecha)
+        if self.registros is not None:
+            self.registros.agregar(msg, soporte, texto)
+
+    def terminar(self, fin: int):
+        if self.estado is not None:
+            marca = self.registros.volcar(final=True) if self.registros is not None else None
+            self.estado.actualizar(self.ruta_txt, fin, self.ultimo, self.agregado, marca)
+
+
+def _hasta_el_fin(mensajes, hasta: date, fin: list):
+    """
+    Corta los mensajes al pasar `hasta` y anota en `fin` el offset del primero
+    que queda fuera (el checkpoint queda ahí para no saltarse lo posterior).
+    """
+    for msg in mensajes:
+        if hasta is not None and msg.fecha > hasta:
+            fin.append(msg.offset)
+            return
+        yield msg
+
+
+def procesar_chat(ruta_txt: str, workers: int = 1, procesos: bool = False,
+                  estado: EstadoIncremental = None, desde: date = None, hasta: date = None,
+                  registros: ExportadorRegistros = None, concurrencia: dict = None,
+                  huellas: HuellasMensajes = None, solo_texto: bool = False) -> AgregadorSoportes:
+    """
+    Procesa un chat en orden de conversación y devuelve sus conteos por
+    (soporte, mes, año); la memoria no crece con el número de mensajes.
+    Los audios se transcriben antes en un pool de `workers` y luego se
+    consultan al llegar a su mensaje, así el resultado es idéntico al serial.
+    Con `concurrencia` ({etapa: tareas}) se usa el pipeline asíncrono, que
+    solapa parseo, decodificación, reconocimiento, OCR y clasificación.
+    Con `estado` solo se procesa lo que hay después del último checkpoint
+    y el agregador devuelto incluye los conteos acumulados del chat.
+    Solo se leen (y transcriben) los mensajes entre `desde` y `hasta`.
+    Con `registros` cada mensaje contado se exporta también con su soporte.
+    Con `huellas` se saltan (antes de transcribir o clasificar) los mensajes
+    que ya se contaron desde otra exportación del mismo chat.
+    Con `solo_texto` no se transcribe ni se hace OCR de ningún adjunto.
+    """
+    agregado = AgregadorSoportes(tipos_soporte)  # <-- reiniciar para cada chat
+
+    offset = 0
+    if estado is not None:
+        if huellas is not None and huellas.perdio_duenos(ruta_txt):
+            # Saltó mensajes de una exportación que ya no está: releer todo para quedárselos
+            log.info("%s: se borró otra exportación del chat, se procesa completo",
+                     os.path.basename(ruta_txt))
+            estado.olvidar(ruta_txt)
+        offset, agregado = estado.punto_de_partida(ruta_txt, tipos_soporte)
+        if offset:
+            log.debug("Reanudando %s desde el byte %d", os.path.basename(ruta_txt), offset)
+    if registros is not None:
+        # Al retomar, la exportación ya tiene lo anterior: solo se agregan las filas nuevas
+        registros.abrir(anexar=offset > 0, marca=estado.marca_registros(ruta_txt) if offset else None)
+
+    def sin_repetidos(mensajes):
+        return huellas.filtrar(mensajes, ruta_txt) if huellas is not None else mensajes
+
+    consumir = ConteoChat(ruta_txt, agregado, estado, registros)
+    fin = []
+    mensajes = sin_repetidos(_hasta_el_fin(mensajes_del_periodo(ruta_txt, offset, desde), hasta, fin))
+
+    if solo_texto:
+        for msg in mensajes:
+            consumir(msg, *clasificar_solo_texto(msg))
+    elif concurrencia is not None:
+        from pipeline_async import PipelineChat
+        # RUTA_AUDIOS y RUTA_IMAGENES apuntan a la misma carpeta de la exportación
+        log.debug("Pipeline asíncrono con concurrencia %s", concurrencia)
+        PipelineChat(RUTA_AUDIOS, clasificar_mensaje, consumir, concurrencia).ejecutar(mensajes)
+    else:
+        adjuntos = prescan_adjuntos(sin_repetidos(mensajes_del_periodo(ruta_txt, offset, desde, hasta)),
+                                    RUTA_AUDIOS)
+        rutas_audio = adjuntos["audio"]
+        rutas_imagen = [os.path.join(RUTA_IMAGENES, os.path.basename(r)) for r in adjuntos["imagen"]]
+        if rutas_audio:
+            log.debug("Transcribiendo %d audios con %d workers", len(rutas_audio), workers)
+        transcripciones = transcribir_en_paralelo(rutas_audio, workers, procesos)
+        textos_imagen = {}
+        if rutas_imagen:
+            from procesar_imagenes import procesar_imagenes
+            log.debug("OCR de %d imágenes con %d workers", len(rutas_imagen), workers)
+            textos_imagen = procesar_imagenes(rutas_imagen, workers)
+        if huellas is not None:
+            huellas.omitidos = 0   # el prescan ya recorrió los mismos mensajes
+
+        for msg in mensajes:
+            texto, encontrado = None, True
+            if msg.adjunto == "audio":
+                ruta_audio = os.path.join(RUTA_AUDIOS, msg.nombre_adjunto)
+                texto, encontrado = transcripciones.get(ruta_audio), ruta_audio in transcripciones
+            elif msg.adjunto == "imagen":
+                ruta_imagen = os.path.join(RUTA_IMAGENES, msg.nombre_adjunto)
+                texto, encontrado = textos_imagen.get(ruta_imagen), ruta_imagen in textos_imagen
+            consumir(msg, *clasificar_mensaje(msg, texto, encontrado))
+
+    if huellas is not None and huellas.omitidos:
+        log.info("%s: %d mensajes ya contados en otra exportación (se omiten)",
+                 os.path.basename(ruta_txt), huellas.omitidos)
+        huellas.omitidos = 0
+    consumir.terminar(fin[0] if fin else os.path.getsize(ruta_txt))
+    return agregado
+
+
+def tabla_de_chat(ruta_txt: str, workers: int = 1, procesos: bool = False,
+                  estado: EstadoIncremental = None, desde: date = None, hasta: date = None,
+                  carpeta_registros: str = None, formato_registros: str = "csv",
+                  concurrencia: dict = None, huellas: HuellasMensajes = None, solo_texto: bool = False):
+    """
+    Procesa un chat y devuelve su matriz de conteos soportes × meses
+    (o None si no hubo datos). Con `carpeta_registros` exporta además
+    los registros clasificados del chat.
+    """
+    exportador = (ExportadorRegistros(carpeta_registros, ruta_txt, formato_registros)
+                  if carpeta_registros else nullcontext())
+    with exportador as registros:
+        agregado = procesar_chat(ruta_txt, workers, procesos, estado, desde, hasta, registros, concurrencia,
+                                 huellas, solo_texto)
+    if registros is not None:
+        log.info("Registros de %s exportados en %s (%d filas)",
+                 os.path.basename(ruta_txt), registros.ruta, registros.filas)
 
     # -------------------------------
-    # Debug rápido antes de generar Excel (opcional)
+    # Debug rápido antes de generar Excel (solo con --debug)
     # -------------------------------
-    df_debug = pd.DataFrame(resultados)
-    print("\nPrimeros 10 registros obtenidos para este chat:\n")
-    print(df_debug.head(10))
-    print("\nConteo por Tipo de Soporte (parcial):\n")
-    print(df_debug["Tipo de Soporte"].value_counts())
+    if log.isEnabledFor(logging.DEBUG):
+        nombre = os.path.basename(ruta_txt)
+        log.debug("Primeros 10 registros obtenidos para %s:\n%s", nombre,
+                  "\n".join(f"  {fecha}  {soporte}" for fecha, soporte in agregado.muestra))
+        # En modo incremental el agregador ya trae lo acumulado de ejecuciones anteriores
+        log.debug("Conteo por Tipo de Soporte de %s (%s):\n%s", nombre,
+                  "acumulado" if estado is not None else "parcial",
+                  "\n".join(f"  {soporte:<40} {n}" for soporte, n in agregado.por_soporte().most_common()))
+
+    if agregado.total == 0:
+        return None
+    from generar_excel import tabla_conteos
+    return tabla_conteos(agregado, tipos_soporte, meses_map)
+
+
+def crear_estado(incremental: bool, solo_texto: bool = False):
+    """
+    Estado del modo incremental (None si no se pidió). Con --solo-texto los
+    checkpoints cuentan los adjuntos como pendientes, así que se guardan
+    aparte: una corrida normal nunca retoma desde ellos.
+    """
+    if not incremental:
+        return None
+    return EstadoIncremental(CARPETA_ESTADO + "_solo_texto" if solo_texto else CARPETA_ESTADO)
+
+
+def estadisticas_transcripciones():
+    """
+    Estadísticas de la caché de transcripciones de este proceso, o None si
+    no se transcribió nada (transcribir ni siquiera se importó).
+    """
+    transcribir = sys.modules.get("transcribir")
+    return transcribir.cache.estadisticas() if transcribir is not None else None
+
+
+def procesar_chat_en_worker(ruta_txt: str, workers: int, incremental: bool,
+                            desde: date = None, hasta: date = None,
+                            perfilar: bool = False, nivel_log: int = logging.INFO,
+                            carpeta_registros: str = None, formato_registros: str = "csv",
+                            concurrencia: dict = None, deduplicar: bool = False, solo_texto: bool = False):
+    """
+    Punto de entrada de cada proceso del driver multi-chat.
+    Devuelve (ruta_txt, matriz de conteos, estadísticas de la caché, perfil del proceso).
+    """
+    configurar_log(nivel_log)
+    perfil.activar(perfilar)
+    estado = crear_estado(incremental, solo_texto)
+    huellas = HuellasMensajes() if deduplicar else None
+    tabla = tabla_de_chat(ruta_txt, workers, False, estado, desde, hasta,
+                          carpeta_registros, formato_registros, concurrencia, huellas, solo_texto)
+    return ruta_txt, tabla, estadisticas_transcripciones(), perfil.exportar()
+
+
+def iterar_tablas(archivos: list, args):
+    """
+    Produce (ruta_txt, tabla) por cada chat a medida que terminan.
+    Con --paralelo > 1 cada chat va en su propio proceso.
+    """
+    if args.paralelo > 1 and len(archivos) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.paralelo, len(archivos))) as pool:
+            futuros = {
+                pool.submit(procesar_chat_en_worker, ruta_txt, args.workers, args.incremental,
+                            args.desde, args.hasta, perfil.activo, log.getEffectiveLevel(),
+                            args.registros, args.formato_registros, args.concurrencia,
+                            args.deduplicar, args.solo_texto): ruta_txt
+                for ruta_txt in archivos
+            }
+            for futuro in as_completed(futuros):
+                try:
+                    ruta_txt, tabla, estadisticas, datos_perfil = futuro.result()
+                except Exception as e:
+                    log.error("Falló el procesamiento de %s: %s", futuros[futuro], e)
+                    continue
+                if estadisticas is not None:
+                    from transcribir import cache as cache_transcripciones
+                    cache_transcripciones.sumar(estadisticas)
+                perfil.fusionar(datos_perfil)
+                yield ruta_txt, tabla
+        return
+
+    estado = crear_estado(args.incremental, args.solo_texto)
+    huellas = HuellasMensajes() if args.deduplicar else None
+    for ruta_txt in archivos:
+        log.debug("Iniciando procesamiento del chat: %s", os.path.basename(ruta_txt))
+        yield ruta_txt, tabla_de_chat(ruta_txt, args.workers, args.procesos, estado, args.desde, args.hasta,
+                                      args.registros, args.formato_registros, args.concurrencia, huellas,
+                                      args.solo_texto)
+
+
+# -------------------------------
+# Modo vigilancia: reprocesar solo lo que cambia en la carpeta de chats
+# -------------------------------
+def _mencionados(ruta_txt: str, nombres: set, bloque: int = 1 << 23) -> bool:
+    """
+    True si el chat menciona alguno de los archivos `nombres`.
+    """
+    buscados = [n.encode("utf-8") for n in nombres]
+    solape = max(len(b) for b in buscados)
+    previo = b""
+    try:
+        with open(ruta_txt, "rb") as f:
+            while datos := f.read(bloque):
+                ventana = previo + datos
+                if any(b in ventana for b in buscados):
+                    return True
+                previo = ventana[-solape:]
+    except OSError:
+        pass
+    return False
+
+
+def chats_afectados(nombres: set, chat: str = None, huellas: HuellasMensajes = None) -> dict:
+    """
+    {ruta del chat: solo por adjuntos} de los chats a reprocesar cuando
+    cambian los archivos `nombres`: los .txt cambiados (o borrados), los
+    chats que mencionan algún adjunto cambiado y, con `huellas`, las otras
+    exportaciones que saltaron mensajes de un .txt borrado. Con `chat` solo ese.
+    """
+    candidatos = {os.path.abspath(ruta): ruta for ruta in listar_chats(chat)}
+    txt = {os.path.join(RUTA_CHATS, n) for n in nombres if n.lower().endswith(".txt")}
+    afectados = {ruta: False for absoluta, ruta in candidatos.items() if absoluta in txt}
+    borrados = [ruta for ruta in txt if not os.path.exists(ruta)]
+    if not chat:
+        # Chats borrados: salen del consolidado
+        afectados.update((ruta, False) for ruta in borrados)
+    if huellas is not None:
+        huellas.refrescar()
+        for ruta in borrados:
+            for otro in huellas.chats_que_saltaron(ruta):
+                if os.path.abspath(otro) in candidatos:
+                    afectados.setdefault(candidatos[os.path.abspath(otro)], False)
+    adjuntos = {n for n in nombres if not n.lower().endswith(".txt")}
+    if adjuntos:
+        for ruta in candidatos.values():
+            if ruta not in afectados and _mencionados(ruta, adjuntos):
+                afectados[ruta] = True
+    return afectados
+
+
+def escribir_salidas_consolidadas(tablas: dict, ruta_libro: str = None):
+    """
+    Reescribe el libro de --libro (todas las hojas) o el consolidado.
+    """
+    from generar_excel import generar_consolidado, LibroInforme
+    if ruta_libro:
+        with LibroInforme(ruta_libro) as libro:
+            for ruta_txt, tabla in tablas.items():
+                libro.agregar_hoja(Path(ruta_txt).stem, tabla)
+    elif len(tablas) > 1:
+        generar_consolidado({Path(ruta_txt).stem: tabla for ruta_txt, tabla in tablas.items()})
+
+
+def vigilar(args, tablas: dict):
+    """
+    Espera cambios en RUTA_CHATS y vuelve a procesar solo los chats afectados
+    en este mismo proceso, así modelos, clasificador y cachés siguen cargados.
+    `tablas` ({ruta del chat: tabla}) es el resultado de la pasada inicial
+    y se mantiene al día para el consolidado. Termina con Ctrl+C.
+    """
+    estado = crear_estado(args.incremental, args.solo_texto)
+    huellas = HuellasMensajes() if args.deduplicar else None
+    vigilante = VigilanteCarpeta(RUTA_CHATS, espera=args.espera, sondeo=args.sondeo)
+    print(f"\nVigilando {RUTA_CHATS} ({vigilante.modo}). Ctrl+C para terminar.")
+    try:
+        for nombres in vigilante.cambios():
+            inicio = time.perf_counter()
+            if args.solo_texto:
+                # Sin transcripción ni OCR los adjuntos no cambian nada
+                nombres = {n for n in nombres if n.lower().endswith(".txt")}
+            afectados = chats_afectados(nombres, args.chat, huellas)
+            if not afectados:
+                log.debug("Ningún chat afectado por %d archivos cambiados", len(nombres))
+                continue
+            # Adjuntos nuevos o borrados
+            obtener_indice(RUTA_AUDIOS).construir()
+
+            for ruta_txt, solo_adjuntos in afectados.items():
+                if not os.path.exists(ruta_txt):
+                    if tablas.pop(ruta_txt, None) is not None:
+                        log.info("%s ya no existe, se quita del consolidado", os.path.basename(ruta_txt))
+                    continue
+                if estado is not None and solo_adjuntos:
+                    # Los mensajes ya contados pueden tener ahora su adjunto
+                    estado.olvidar(ruta_txt)
+                tabla = tabla_de_chat(ruta_txt, args.workers, args.procesos, estado, args.desde, args.hasta,
+                                      args.registros, args.formato_registros, args.concurrencia, huellas,
+                                      args.solo_texto)
+                if tabla is None:
+                    tablas.pop(ruta_txt, None)
+                    log.info("No se generó informe para %s (no hubo datos).", os.path.basename(ruta_txt))
+                    continue
+                tablas[ruta_txt] = tabla
+                if not args.libro:
+                    from generar_excel import escribir_informe, nombre_informe
+                    print(f"[OK] Informe guardado en: {escribir_informe(tabla, nombre_informe(ruta_txt))}")
+
+            escribir_salidas_consolidadas(tablas, args.libro)
+            log.info("Informe actualizado en %.1f s (%d chats: %s)", time.perf_counter() - inicio,
+                     len(afectados), ", ".join(os.path.basename(r) for r in afectados))
+    except KeyboardInterrupt:
+        print("\nVigilancia terminada.")
+    finally:
+        vigilante.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera el informe de soportes a partir de los chats.")
+    parser.add_argument("chat", nargs="?", help="Nombre o ruta de un chat .txt (por defecto todos)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Número de workers para transcribir audios (1 = serial)")
+    parser.add_argument("--procesos", action="store_true",
+                        help="Usar un pool de procesos en lugar de hilos")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Procesar solo los mensajes nuevos desde la última ejecución")
+    parser.add_argument("--paralelo", type=int, default=1,
+                        help="Número de chats procesados a la vez, uno por proceso (1 = en serie)")
+    parser.add_argument("--desde", type=date.fromisoformat, default=date(ANIO_MINIMO, 1, 1),
+                        help="Primera fecha a contar, AAAA-MM-DD (por defecto %(default)s)")
+    parser.add_argument("--hasta", type=date.fromisoformat, default=None,
+                        help="Última fecha a contar, AAAA-MM-DD (por defecto sin límite)")
+    parser.add_argument("--perfil", nargs="?", const="perfil_informe.json", default=None, metavar="TRAZA",
+                        help="Medir tiempos por etapa y guardar la traza JSON (por defecto %(const)s)")
+    parser.add_argument("--cprofile", default=None, metavar="RUTA",
+                        help="Guardar un volcado cProfile/pstats del bucle principal")
+    parser.add_argument("--libro", nargs="?", const="informe_sedes.xlsx", default=None, metavar="RUTA",
+                        help="Escribir un solo libro (consolidado + una hoja por chat) en streaming "
+                             "en lugar de un Excel por chat (por defecto %(const)s)")
+    parser.add_argument("--registros", default=None, metavar="CARPETA",
+                        help="Exportar los registros clasificados de cada chat a esta carpeta")
+    parser.add_argument("--formato-registros", choices=FORMATOS, default="csv",
+                        help="Formato de los registros exportados (parquet necesita pyarrow)")
+    parser.add_argument("--asincrono", action="store_true",
+                        help="Pipeline asíncrono: parseo, decodificación, reconocimiento, OCR y "
+                             "clasificación a la vez, con colas acotadas")
+    parser.add_argument("--concurrencia", default="", metavar="ETAPA=N,...",
+                        help="Tareas por etapa del pipeline asíncrono (decodificacion, reconocimiento, "
+                             "ocr, clasificacion); decodificación y OCR usan --workers por defecto")
+    parser.add_argument("--clasificador", choices=CLASIFICADORES, default=None,
+                        help="Motor de clasificación (por defecto INFORME_CLASIFICADOR o 'subcadena')")
+    parser.add_argument("--deduplicar", action="store_true",
+                        help="Saltar los mensajes ya contados desde otra exportación del mismo chat")
+    parser.add_argument("--solo-texto", action="store_true",
+                        help="Clasificar solo el texto: sin transcripción ni OCR, los adjuntos quedan "
+                             "pendientes y no se cargan los módulos de audio ni de imágenes")
+    parser.add_argument("--sin-vad", action="store_true",
+                        help="No recortar silencios ni dividir las notas largas antes de reconocerlas")
+    parser.add_argument("--vigilar", action="store_true",
+                        help="Tras procesar, seguir vigilando la carpeta de chats y reprocesar solo "
+                             "los chats con cambios (.txt o sus adjuntos)")
+    parser.add_argument("--sondeo", action="store_true",
+                        help="Con --vigilar, revisar la carpeta periódicamente en lugar de usar inotify")
+    parser.add_argument("--espera", type=float, default=ESPERA, metavar="S",
+                        help="Con --vigilar, segundos sin cambios antes de procesar (por defecto %(default)s)")
+    parser.add_argument("--debug", action="store_true", help="Mostrar los mensajes de depuración")
+    args = parser.parse_args()
+    # Con --solo-texto no hay etapas que solapar: el pipeline asíncrono no aplica
+    if args.asincrono and not args.solo_texto:
+        from pipeline_async import parsear_concurrencia
+        try:
+            args.concurrencia = parsear_concurrencia(args.concurrencia, {"decodificacion": args.workers,
+                                                                         "ocr": args.workers})
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        args.concurrencia = None
+
+    configurar_log(logging.DEBUG if args.debug else logging.INFO)
+    perfil.activar(args.perfil is not None)
+    if args.clasificador:
+        usar_clasificador(args.clasificador)
+    if args.sin_vad:
+        # Por entorno, para que lo vean también los procesos de --paralelo
+        os.environ["INFORME_VAD"] = "0"
+
+    # Comprobar pyarrow antes de procesar nada (cada chat lo necesitaría al exportar)
+    if args.registros and args.formato_registros == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        log.error("--formato-registros parquet necesita pyarrow:  pip install pyarrow")
+        sys.exit(1)
+
+    archivos_a_procesar = listar_chats(args.chat)
+    if not archivos_a_procesar and not args.vigilar:
+        print("⚠️ No se encontraron archivos .txt en la carpeta de chats.")
+        sys.exit(0)
+
+    existentes = []
+    for ruta_txt in archivos_a_procesar:
+        if not os.path.exists(ruta_txt):
+            log.error("No existe el archivo: %s", ruta_txt)
+            continue
+        existentes.append(ruta_txt)
 
     # -------------------------------
-    # Generar Excel para ESTE chat
+    # Procesar cada chat por separado y generar su Excel en cuanto termina
     # -------------------------------
-    ruta_generado = generar_excel(resultados, tipos_soporte, meses_map, ruta_txt)
-    if ruta_generado:
+    # Con --cprofile el bucle de chats (en este proceso) queda bajo cProfile
+    perfilador = None
+    if args.cprofile:
+        import cProfile
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+
+    # Los módulos de Excel (pandas) se cargan recién al empezar a procesar
+    from generar_excel import escribir_informe, nombre_informe, generar_consolidado, LibroInforme
+
+    # Con --libro cada tabla va a su hoja en cuanto termina el chat
+    libro = LibroInforme(args.libro) if args.libro else None
+
+    tablas = {}
+    for ruta_txt, tabla in iterar_tablas(existentes, args):
+        if tabla is None:
+            log.info("No se generó informe para %s (no hubo datos).", os.path.basename(ruta_txt))
+            continue
+        tablas[ruta_txt] = tabla
+        if libro is not None:
+            hoja = libro.agregar_hoja(Path(ruta_txt).stem, tabla)
+            print(f"[OK] Hoja '{hoja}' agregada a {libro.ruta}")
+            continue
+        ruta_generado = escribir_informe(tabla, nombre_informe(ruta_txt))
         print(f"[OK] Informe guardado en: {ruta_generado}")
-    else:
-        print("[INFO] No se generó informe (no hubo datos).")
+
+    if perfilador is not None:
+        perfilador.disable()
+        perfilador.dump_stats(args.cprofile)
+        log.info("Volcado cProfile guardado en %s (ver con: python -m pstats %s)", args.cprofile, args.cprofile)
+
+    # -------------------------------
+    # Libro consolidado con todas las sedes (en el orden de la lista de chats)
+    # -------------------------------
+    if libro is not None:
+        libro.cerrar()
+    elif len(tablas) > 1:
+        generar_consolidado({
+            Path(ruta_txt).stem: tablas[ruta_txt] for ruta_txt in existentes if ruta_txt in tablas
+        })
+
+    # Resumen de las cachés al final de la ejecución (solo de las etapas que se usaron)
+    if "transcribir" in sys.modules:
+        from transcribir import resumen_cache
+        print(resumen_cache())
+    if "procesar_imagenes" in sys.modules:
+        from procesar_imagenes import resumen_cache_ocr
+        print(resumen_cache_ocr())
+
+    if args.perfil:
+        print("\nTiempos por etapa:\n")
+        print(perfil.resumen())
+        perfil.guardar_traza(args.perfil, {"chats": existentes, "workers": args.workers,
+                                           "paralelo": args.paralelo})
+        print(f"\n[OK] Traza de perfilado guardada en: {args.perfil}")
+
+    if args.vigilar:
+        vigilar(args, {ruta_txt: tablas[ruta_txt] for ruta_txt in existentes if ruta_txt in tablas})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# agregador.py
+# ===============================
+# Agregador en streaming de soportes por (categoría, mes, año)
+# Se actualiza mensaje a mensaje; la memoria depende del número de
+# categorías y años, no del número de mensajes del chat.
+# ===============================
+
+from collections import Counter
+
+from parser_chat import MESES
+
+TAM_MUESTRA = 10
+
+
+class AgregadorSoportes:
+    """
+    Conteos en forma compacta: {año: [fila por categoría de 12 enteros]}.
+    Las categorías de `tipos_soporte` tienen índice fijo; otras etiquetas
+    (p. ej. "Imagen no encontrada") se agregan al final cuando aparecen.
+    """
+
+    def __init__(self, tipos_soporte=()):
+        self.categorias = list(tipos_soporte)
+        self._indice = {c: i for i, c in enumerate(self.categorias)}
+        self._anios = {}
+        self.total = 0
+        self.muestra = []   # primeros registros (fecha, soporte) para depurar
+
+    def _indice_de(self, soporte: str) -> int:
+        indice = self._indice.get(soporte)
+        if indice is None:
+            indice = self._indice[soporte] = len(self.categorias)
+            self.categorias.append(soporte)
+        return indice
+
+    def _filas(self, anio: int, indice: int) -> list:
+        filas = self._anios.get(anio)
+        if filas is None:
+            filas = self._anios[anio] = []
+        while len(filas) <= indice:
+            filas.append([0] * 12)
+        return filas
+
+    # -------------------------------
+    # Actualización
+    # -------------------------------
+    def agregar(self, soporte: str, fecha, cantidad: int = 1):
+        indice = self._indice_de(soporte)
+        self._filas(fecha.year, indice)[indice][fecha.month - 1] += cantidad
+        self.total += cantidad
+        if len(self.muestra) < TAM_MUESTRA:
+            self.muestra.append((fecha, soporte))
+
+    def agregar_mes(self, soporte: str, mes: int, anio: int, cantidad: int = 1):
+        """
+        Igual que agregar() pero con mes (1-12) y año sueltos.
+        """
+        indice = self._indice_de(soporte)
+        self._filas(anio, indice)[indice][mes - 1] += cantidad
+        self.total += cantidad
+
+    def sumar(self, otro: "AgregadorSoportes"):
+        """
+        Suma los conteos de otro agregador (p. ej. lo acumulado en otro proceso).
+        """
+        for (soporte, mes, anio), n in otro.items():
+            self.agregar_mes(soporte, mes, anio, n)
+        return self
+
+    # -------------------------------
+    # Lectura
+    # -------------------------------
+    def items(self):
+        """
+        Recorre ((soporte, mes 1-12, año), cantidad) de las celdas no vacías.
+        """
+        for anio, filas in sorted(self._anios.items()):
+            for indice, fila in enumerate(filas):
+                for mes, n in enumerate(fila, start=1):
+                    if n:
+                        yield (self.categorias[indice], mes, anio), n
+
+    def por_soporte(self) -> Counter:
+        conteo = Counter()
+        for (soporte, _, _), n in self.items():
+            conteo[soporte] += n
+        return conteo
+
+    def matriz(self, categorias: list, anio: int = None) -> list:
+        """
+        Lista de filas (una por categoría pedida) con los 12 meses, sumando
+        todos los años o solo `anio`. Las categorías desconocidas quedan en cero.
+        """
+        salida = [[0] * 12 for _ in categorias]
+        for a, filas in self._anios.items():
+            if anio is not None and a != anio:
+                continue
+            for fila_salida, categoria in zip(salida, categorias):
+                indice = self._indice.get(categoria)
+                if indice is not None and indice < len(filas):
+                    for mes, n in enumerate(filas[indice]):
+                        fila_salida[mes] += n
+        return salida
+
+    # -------------------------------
+    # Conversión para el estado incremental: [[soporte, "Mes", año, n], ...]
+    # -------------------------------
+    def a_lista(self) -> list:
+        return [[soporte, MESES[mes - 1], anio, n] for (soporte, mes, anio), n in self.items()]
+
+    @classmethod
+    def desde_lista(cls, filas: list, tipos_soporte=()) -> "AgregadorSoportes":
+        agregador = cls(tipos_soporte)
+        for soporte, mes, anio, n in filas:
+            agregador.agregar_mes(soporte, MESES.index(mes) + 1, anio, n)
+        return agregador
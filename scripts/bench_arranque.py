@@ -0,0 +1,145 @@
+# bench_arranque.py
+# ===============================
+# Benchmark del arranque: cuánto tarda cada punto de entrada en importarse
+# en un intérprete nuevo, qué módulos pesados carga y si crea carpetas.
+# También mide cada módulo de etapa por separado (lo que cuesta la primera
+# vez que se usa esa etapa).
+#   py bench_arranque.py                 -> 10 repeticiones por caso
+#   py bench_arranque.py --detalle 15    -> además, los 15 imports más lentos (-X importtime)
+# ===============================
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+CARPETA_SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+
+ENTRADAS = {
+    "crear_informe.py": os.path.join(CARPETA_SCRIPTS, "crear_informe.py"),
+    "generaInforme_funcional_hasta_imagenes.py": os.path.join(CARPETA_SCRIPTS, "..",
+                                                              "generaInforme_funcional_hasta_imagenes.py"),
+}
+
+ETAPAS = ["parser_chat", "clasificar", "transcribir", "procesar_imagenes", "pipeline_async", "generar_excel"]
+
+PESADOS = ["pandas", "numpy", "speech_recognition", "PIL", "pytesseract", "asyncio", "xlsxwriter"]
+
+# Se ejecuta en un intérprete nuevo; imprime una línea JSON
+_CODIGO = """
+import sys, time, json, importlib.util
+inicio = time.perf_counter()
+{carga}
+segundos = time.perf_counter() - inicio
+print(json.dumps({{"segundos": segundos, "pesados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+
+def carga_archivo(ruta: str) -> str:
+    # Sin ejecutar main(): __name__ no es "__main__"
+    return (f"spec = importlib.util.spec_from_file_location('entrada', {os.path.abspath(ruta)!r})\n"
+            "spec.loader.exec_module(importlib.util.module_from_spec(spec))")
+
+
+def carga_modulo(nombre: str) -> str:
+    return f"import {nombre}"
+
+
+def _entorno() -> dict:
+    entorno = dict(os.environ)
+    entorno["PYTHONPATH"] = os.pathsep.join(filter(None, [CARPETA_SCRIPTS, entorno.get("PYTHONPATH")]))
+    return entorno
+
+
+def _ejecutar(carga: str, carpeta: str, opciones: list = ()) -> subprocess.CompletedProcess:
+    codigo = _CODIGO.format(carga=carga, pesados=PESADOS)
+    return subprocess.run([sys.executable, *opciones, "-c", codigo], cwd=carpeta, env=_entorno(),
+                          capture_output=True, text=True)
+
+
+def medir(carga: str, repeticiones: int) -> dict:
+    """
+    Importa en `repeticiones` intérpretes nuevos (cada uno en una carpeta
+    vacía) y devuelve las medianas del import y del proceso completo.
+    """
+    imports, procesos, carpetas = [], [], set()
+    pesados = []
+    for _ in range(repeticiones):
+        with tempfile.TemporaryDirectory() as carpeta:
+            inicio = time.perf_counter()
+            salida = _ejecutar(carga, carpeta)
+            procesos.append(time.perf_counter() - inicio)
+            if salida.returncode != 0:
+                raise RuntimeError(salida.stderr.strip().splitlines()[-1])
+            datos = json.loads(salida.stdout.strip().splitlines()[-1])
+            imports.append(datos["segundos"])
+            pesados = datos["pesados"]
+            carpetas.update(os.listdir(carpeta))
+    return {
+        "import_ms": round(statistics.median(imports) * 1000, 1),
+        "proceso_ms": round(statistics.median(procesos) * 1000, 1),
+        "pesados": pesados,
+        "carpetas_creadas": sorted(carpetas),
+    }
+
+
+def detalle_importtime(carga: str, n: int) -> list:
+    """
+    Los `n` imports con mayor tiempo acumulado según -X importtime: [(ms, módulo)].
+    """
+    with tempfile.TemporaryDirectory() as carpeta:
+        salida = _ejecutar(carga, carpeta, ["-X", "importtime"])
+    filas = []
+    for linea in salida.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, modulo = linea.split(":", 1)[1].split("|")
+        filas.append((int(acumulado) / 1000, modulo.strip()))
+    return sorted(filas, reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del tiempo de arranque (imports).")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--detalle", type=int, default=0, metavar="N",
+                        help="Mostrar los N imports más lentos de cada punto de entrada")
+    parser.add_argument("--json", default=None, help="Guardar los resultados en este JSON")
+    args = parser.parse_args()
+
+    casos = [("intérprete vacío", "pass")]
+    casos += [(nombre, carga_archivo(ruta)) for nombre, ruta in ENTRADAS.items()]
+    casos += [(f"etapa {nombre}", carga_modulo(nombre)) for nombre in ETAPAS]
+
+    resultados = {}
+    print(f"{'caso':<44} {'import':>9} {'proceso':>9}  módulos pesados / carpetas creadas")
+    for nombre, carga in casos:
+        try:
+            r = resultados[nombre] = medir(carga, args.repeticiones)
+        except RuntimeError as e:
+            print(f"{nombre:<44} no se pudo importar: {e}")
+            continue
+        extras = ", ".join(r["pesados"]) or "-"
+        if r["carpetas_creadas"]:
+            extras += f" / crea: {', '.join(r['carpetas_creadas'])}"
+        print(f"{nombre:<44} {r['import_ms']:>7.1f}ms {r['proceso_ms']:>7.1f}ms  {extras}")
+
+    if args.detalle:
+        for nombre, ruta in ENTRADAS.items():
+            print(f"\nImports más lentos de {nombre}:\n")
+            for ms, modulo in detalle_importtime(carga_archivo(ruta), args.detalle):
+                print(f"  {ms:8.1f} ms  {modulo}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "repeticiones": args.repeticiones,
+                       "casos": resultados}, f, ensure_ascii=False, indent=2)
+        print(f"\n[OK] Resultados guardados en: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# bench_clasificar.py
+# ===============================
+# Benchmark de los clasificadores sobre mensajes de un chat
+# Compara el motor por subcadena (con y sin memoria) con el motor por tokens:
+# velocidad, coincidencia entre ambos y ejemplos de mensajes donde difieren.
+# También mide el motor por subcadena contra el bucle original
+# (`any(p in mensaje)` por categoría) en mensajes y en textos largos
+# (transcripciones, OCR), y comprueba que clasifican igual.
+#   py bench_clasificar.py                     -> chat sintético de 200.000 líneas
+#   py bench_clasificar.py --chat "../chats_soporte/Mi chat.txt"
+# ===============================
+
+import os
+import time
+import argparse
+import tempfile
+from collections import Counter
+
+import clasificar
+from clasificar import MotorClasificacion, MotorPuntuacion, tipos_soporte, SOPORTE_PENDIENTE
+from parser_chat import iterar_mensajes
+from generar_sintetico import generar_chat
+
+# Casos conocidos donde la subcadena se equivoca por no respetar palabras completas
+CASOS_LIMITE = [
+    "me sale error de credito en la caja", "el pedido quedo pospuesto", "groups de whatsapp",
+    "se fue la conexión", "la impresora no imprime", "no tengo internet", "ok", "gracias",
+]
+
+
+# Mensajes consecutivos que se unen para simular un texto largo
+MENSAJES_POR_TEXTO = 50
+
+
+class BucleOriginal:
+    """
+    clasificar_soporte antes del motor compilado: recorre las categorías en
+    orden y prueba cada palabra clave con `in`.
+    """
+
+    def clasificar_lote(self, mensajes) -> list:
+        return [self.clasificar(m) for m in mensajes]
+
+    @staticmethod
+    def clasificar(mensaje: str) -> str:
+        mensaje = mensaje.lower()
+        for tipo, palabras in tipos_soporte.items():
+            if any(p in mensaje for p in palabras):
+                return tipo
+        return SOPORTE_PENDIENTE
+
+
+def mensajes_de(ruta: str) -> list:
+    return [m.cuerpo for m in iterar_mensajes(ruta) if m.adjunto is None and not m.es_de_soporte]
+
+
+def cronometrar(motor, mensajes: list) -> tuple:
+    inicio = time.perf_counter()
+    resultado = motor.clasificar_lote(mensajes)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los clasificadores de soportes.")
+    parser.add_argument("--chat", default=None, help="Chat .txt real (por defecto uno sintético)")
+    parser.add_argument("--lineas", type=int, default=200_000)
+    parser.add_argument("--ejemplos", type=int, default=10, help="Diferencias a mostrar")
+    args = parser.parse_args()
+
+    if args.chat:
+        mensajes = mensajes_de(args.chat)
+    else:
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = os.path.join(carpeta, "chat_sintetico.txt")
+            generar_chat(ruta, args.lineas)
+            mensajes = mensajes_de(ruta)
+    mensajes += CASOS_LIMITE
+    print(f"{len(mensajes)} mensajes ({len(set(mensajes))} distintos)\n")
+
+    motores = [
+        ("subcadena", MotorClasificacion(tipos_soporte, tam_memo=0)),
+        ("subcadena+memo", MotorClasificacion(tipos_soporte)),
+        ("tokens+memo", MotorPuntuacion(tipos_soporte)),
+        ("tokens", MotorPuntuacion(tipos_soporte, tam_memo=0)),
+    ]
+    resultados = {}
+    for nombre, motor in motores:
+        segundos, resultados[nombre] = cronometrar(motor, mensajes)
+        print(f"{nombre:<16} {segundos:7.3f} s  {len(mensajes) / segundos:12,.0f} mensajes/s")
+
+    # Textos largos: mensajes consecutivos unidos y, aparte, solo los que no
+    # tienen ninguna palabra clave (el peor caso: hay que recorrerlo todo)
+    sin_clave = [m for m, s in zip(mensajes, resultados["subcadena"]) if s == SOPORTE_PENDIENTE]
+    textos = [" ".join(mensajes[i:i + MENSAJES_POR_TEXTO])
+              for i in range(0, len(mensajes), MENSAJES_POR_TEXTO)]
+    textos_sin_clave = [" ".join(sin_clave[i:i + MENSAJES_POR_TEXTO])
+                        for i in range(0, len(sin_clave), MENSAJES_POR_TEXTO)]
+    motor = "autómata" if clasificar.ahocorasick is not None else "bucle, sin pyahocorasick"
+    print(f"\nSubcadena ({motor}) contra el bucle original, sin memoria:\n")
+    for nombre, entradas in [("mensajes", mensajes), (f"textos de {MENSAJES_POR_TEXTO} mensajes", textos),
+                             ("textos sin palabra clave", textos_sin_clave)]:
+        if not entradas:
+            continue
+        t_original, original = cronometrar(BucleOriginal(), entradas)
+        t_nuevo, nuevo = cronometrar(MotorClasificacion(tipos_soporte, tam_memo=0), entradas)
+        print(f"  {nombre:<26} original {t_original:7.3f} s  nuevo {t_nuevo:7.3f} s  "
+              f"x{t_original / t_nuevo:5.2f}  iguales: {original == nuevo}")
+
+    referencia, nuevo = resultados["subcadena"], resultados["tokens"]
+    iguales = sum(a == b for a, b in zip(referencia, nuevo))
+    print(f"\nCoincidencia tokens vs subcadena: {iguales / len(mensajes):.2%}")
+
+    cambios = Counter((m, a, b) for m, a, b in zip(mensajes, referencia, nuevo) if a != b)
+    if cambios:
+        print("\nDiferencias más frecuentes (mensaje: subcadena -> tokens):\n")
+        for (mensaje, a, b), n in cambios.most_common(args.ejemplos):
+            print(f"  {n:>6} x {mensaje[:50]!r}: {a} -> {b}")
+
+
+if __name__ == "__main__":
+    main()
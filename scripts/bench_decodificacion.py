@@ -0,0 +1,72 @@
+# bench_decodificacion.py
+# ===============================
+# Benchmark: decodificación en memoria vs WAV temporal
+# Mide la latencia por archivo de los dos caminos de transcribir.py
+#   py bench_decodificacion.py                    -> todos los PTT-*.opus de ../chats_soporte
+#   py bench_decodificacion.py --carpeta X -n 3   -> 3 repeticiones por archivo
+# ===============================
+
+import os
+import argparse
+import statistics
+import time
+
+import speech_recognition as sr
+
+from transcribir import convertir_a_wav, decodificar_pcm
+
+
+def camino_archivo(ruta_audio: str):
+    """
+    Camino clásico: ffmpeg -> WAV temporal -> sr.AudioFile -> borrar.
+    """
+    ruta_wav = convertir_a_wav(ruta_audio)
+    if ruta_wav is None:
+        return None
+    try:
+        with sr.AudioFile(ruta_wav) as source:
+            return sr.Recognizer().record(source)
+    finally:
+        os.remove(ruta_wav)
+
+
+def medir(funcion, rutas: list, repeticiones: int) -> list:
+    tiempos = []
+    for ruta in rutas:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion(ruta)
+            tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def resumen(nombre: str, tiempos: list):
+    tiempos = sorted(tiempos)
+    p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+    print(f"{nombre:<12} n={len(tiempos):<5} media={statistics.mean(tiempos) * 1000:8.1f} ms  "
+          f"mediana={statistics.median(tiempos) * 1000:8.1f} ms  p95={p95 * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara la decodificación en memoria con la de WAV temporal.")
+    parser.add_argument("--carpeta", default=os.path.join("..", "chats_soporte"))
+    parser.add_argument("-n", "--repeticiones", type=int, default=1)
+    args = parser.parse_args()
+
+    rutas = [
+        os.path.join(args.carpeta, f) for f in sorted(os.listdir(args.carpeta))
+        if f.lower().endswith(".opus")
+    ]
+    if not rutas:
+        print("⚠️ No se encontraron audios .opus para el benchmark.")
+        return
+
+    # Calentar ffmpeg / caché del sistema de archivos
+    decodificar_pcm(rutas[0])
+
+    resumen("memoria", medir(decodificar_pcm, rutas, args.repeticiones))
+    resumen("wav_temp", medir(camino_archivo, rutas, args.repeticiones))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# bench_informe.py
+# ===============================
+# Benchmark de punta a punta sobre una exportación sintética
+# Mide por separado cada etapa del informe para detectar regresiones:
+# parseo, clasificación, transcripción (motor "stub"), agregación,
+# escritura del Excel y el bucle principal completo de procesar_chat.
+#   py bench_informe.py                          -> 100.000 líneas
+#   py bench_informe.py --lineas 500000 --audios 0.05 --json bench.json
+# Todo se genera y se escribe en una carpeta temporal; solo queda el JSON.
+# ===============================
+
+import os
+import json
+import math
+import time
+import wave
+import shutil
+import argparse
+import platform
+import tempfile
+import importlib.util
+from array import array
+from contextlib import redirect_stdout
+from datetime import date, datetime
+
+from generar_sintetico import generar_exportacion
+
+RUTA_SCRIPT_PRINCIPAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                     "generaInforme_funcional_hasta_imagenes.py")
+
+INICIO_SINTETICO = date(2024, 6, 1)
+
+# Audio de relleno para la transcripción cuando no hay ffmpeg (WAV PCM 16 kHz mono)
+FRECUENCIA_WAV = 16000
+SEGUNDOS_WAV = 1
+
+meses_map = {
+    "January": "Enero", "February": "Febrero", "March": "Marzo",
+    "April": "Abril", "May": "Mayo", "June": "Junio",
+    "July": "Julio", "August": "Agosto", "September": "Septiembre",
+    "October": "Octubre", "November": "Noviembre", "December": "Diciembre"
+}
+
+
+def _cronometrar(resultados: dict, nombre: str, elementos: int, funcion, *args, **kwargs):
+    """
+    Ejecuta `funcion`, guarda segundos y elementos/s en `resultados[nombre]`
+    y devuelve lo que devuelva la función.
+    """
+    inicio = time.perf_counter()
+    valor = funcion(*args, **kwargs)
+    segundos = time.perf_counter() - inicio
+    n = elementos(valor) if callable(elementos) else elementos
+    resultados[nombre] = {
+        "segundos": round(segundos, 4),
+        "elementos": n,
+        "por_segundo": round(n / segundos, 1) if segundos > 0 else None,
+    }
+    return valor
+
+
+def _audios_wav(rutas: list, carpeta: str) -> list:
+    """
+    Escribe en `carpeta` un WAV (tono de 1 s, PCM 16 bits) por cada audio de
+    `rutas` y devuelve sus rutas. transcribir.cargar_audio lee los WAV sin
+    ffmpeg, así la etapa mide igual el VAD y el motor "stub".
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    tono = array("h", (int(8000 * math.sin(2 * math.pi * 440 * i / FRECUENCIA_WAV))
+                       for i in range(FRECUENCIA_WAV * SEGUNDOS_WAV)))
+    rutas_wav = []
+    for ruta in rutas:
+        ruta_wav = os.path.join(carpeta, os.path.splitext(os.path.basename(ruta))[0] + ".wav")
+        with wave.open(ruta_wav, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(FRECUENCIA_WAV)
+            w.writeframes(tono.tobytes())
+        rutas_wav.append(ruta_wav)
+    return rutas_wav
+
+
+def _cargar_script_principal():
+    spec = importlib.util.spec_from_file_location("informe_principal", RUTA_SCRIPT_PRINCIPAL)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def ejecutar(carpeta: str, args) -> dict:
+    """
+    Genera la exportación en `carpeta` y mide cada etapa. Se ejecuta con
+    `carpeta/trabajo` como directorio actual para que las carpetas relativas
+    (transcripciones, cachés, índices) queden dentro de la carpeta temporal.
+    """
+    chats = os.path.join(carpeta, "chats")
+    trabajo = os.path.join(carpeta, "trabajo")
+    os.makedirs(trabajo)
+    os.chdir(trabajo)
+
+    etapas = {}
+    generado = _cronometrar(etapas, "generacion", lambda r: sum(c["lineas"] for c in r),
+                            generar_exportacion, chats, 1, lineas=args.lineas,
+                            prop_audios=args.audios, prop_imagenes=args.imagenes,
+                            inicio=INICIO_SINTETICO)[0]
+    ruta = generado["ruta"]
+
+    # Importaciones aquí: las carpetas relativas que crean los módulos al usarse
+    # (transcripciones, cachés, índices) quedan dentro de `trabajo`
+    from parser_chat import iterar_mensajes
+    from clasificar import clasificar_lote, tipos_soporte, SOPORTE_PENDIENTE
+    from agregador import AgregadorSoportes
+    from generar_excel import tabla_conteos, escribir_informe
+    from transcribir import transcribir_lote
+
+    mensajes = _cronometrar(etapas, "parseo", len, lambda: list(iterar_mensajes(ruta)))
+
+    textos = [m for m in mensajes if m.adjunto is None and not m.es_de_soporte]
+    soportes = _cronometrar(etapas, "clasificacion", len(textos),
+                            clasificar_lote, [m.cuerpo for m in textos])
+
+    rutas_audio = [os.path.join(chats, m.nombre_adjunto) for m in mensajes if m.adjunto == "audio"]
+    entrada = "opus"
+    if not shutil.which("ffmpeg"):
+        # Sin ffmpeg los .opus no se pueden decodificar: se transcriben WAV equivalentes
+        rutas_audio = _audios_wav(rutas_audio, os.path.join(carpeta, "wav"))
+        entrada = "wav"
+    _cronometrar(etapas, "transcripcion", len(rutas_audio),
+                 transcribir_lote, rutas_audio, args.workers, usar_cache=False)
+    etapas["transcripcion"]["entrada"] = entrada
+
+    def agregar():
+        agregador = AgregadorSoportes(tipos_soporte)
+        for msg, soporte in zip(textos, soportes):
+            agregador.agregar(soporte or SOPORTE_PENDIENTE, msg.fecha)
+        return agregador
+    agregado = _cronometrar(etapas, "agregacion", len(textos), agregar)
+
+    _cronometrar(etapas, "excel", len(tipos_soporte),
+                 lambda: escribir_informe(tabla_conteos(agregado, tipos_soporte, meses_map),
+                                          os.path.join(trabajo, "bench.xlsx")))
+
+    # Bucle principal completo (con su salida de depuración descartada)
+    principal = _cargar_script_principal()
+    principal.RUTA_AUDIOS = principal.RUTA_IMAGENES = chats
+    with open(os.devnull, "w") as nulo, redirect_stdout(nulo):
+        _cronometrar(etapas, "bucle_principal", len(mensajes), principal.procesar_chat,
+                     ruta, args.workers, desde=INICIO_SINTETICO)
+
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "reconocedor": os.environ.get("INFORME_RECONOCEDOR"),
+        "configuracion": {"lineas": args.lineas, "audios": args.audios,
+                          "imagenes": args.imagenes, "workers": args.workers},
+        "chat": {"mensajes": len(mensajes), "bytes": os.path.getsize(ruta),
+                 "audios": generado["audios"], "imagenes": generado["imagenes"]},
+        "etapas": etapas,
+    }
+
+
+def imprimir(reporte: dict):
+    print(f"\nChat sintético: {reporte['chat']['mensajes']} mensajes, "
+          f"{reporte['chat']['bytes'] / 1e6:.1f} MB, {reporte['chat']['audios']} audios, "
+          f"{reporte['chat']['imagenes']} imágenes\n")
+    for nombre, etapa in reporte["etapas"].items():
+        por_segundo = f"{etapa['por_segundo']:,.0f}/s" if etapa["por_segundo"] else ""
+        print(f"  {nombre:<16} {etapa['segundos']:8.3f} s  {etapa['elementos']:>9}  {por_segundo}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del informe de soportes.")
+    parser.add_argument("--lineas", type=int, default=100_000)
+    parser.add_argument("--audios", type=float, default=0.03, help="Proporción de mensajes con audio")
+    parser.add_argument("--imagenes", type=float, default=0.02, help="Proporción de mensajes con imagen")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--json", default="bench_informe.json", help="Ruta del reporte JSON")
+    args = parser.parse_args()
+
+    # La transcripción se mide sin red ni modelos salvo que se pida otro motor
+    os.environ.setdefault("INFORME_RECONOCEDOR", "stub")
+    ruta_json = os.path.abspath(args.json)
+    directorio = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_informe_") as carpeta:
+        try:
+            reporte = ejecutar(carpeta, args)
+        finally:
+            os.chdir(directorio)
+
+    imprimir(reporte)
+    with open(ruta_json, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    print(f"\n[OK] Reporte guardado en {ruta_json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# bench_parser.py
+# ===============================
+# Benchmark del parser de chats sobre una exportación sintética
+# Compara el bucle clásico (strptime + regex por línea) con parser_chat
+#   py bench_parser.py                 -> 1.000.000 de líneas
+#   py bench_parser.py --lineas 200000
+# ===============================
+
+import os
+import argparse
+import tempfile
+import time
+from datetime import datetime
+
+from parser_chat import iterar_mensajes, regex_audio, regex_imagen
+from generar_sintetico import generar_chat
+
+meses_map = {
+    "January": "Enero", "February": "Febrero", "March": "Marzo",
+    "April": "Abril", "May": "Mayo", "June": "Junio",
+    "July": "Julio", "August": "Agosto", "September": "Septiembre",
+    "October": "Octubre", "November": "Noviembre", "December": "Diciembre"
+}
+
+def bucle_clasico(ruta: str) -> int:
+    n = 0
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                fecha = datetime.strptime(linea.split(",")[0], "%d/%m/%Y").date()
+            except Exception:
+                continue
+            regex_audio.search(linea)
+            regex_imagen.search(linea)
+            meses_map.get(fecha.strftime("%B"), fecha.strftime("%B"))
+            n += 1
+    return n
+
+
+def bucle_parser(ruta: str) -> int:
+    n = 0
+    for msg in iterar_mensajes(ruta):
+        msg.mes
+        n += 1
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del parser de chats.")
+    parser.add_argument("--lineas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "chat_sintetico.txt")
+        generar_chat(ruta, args.lineas, lineas_por_dia=500)
+        print(f"Chat sintético: {args.lineas} líneas, {os.path.getsize(ruta) / 1e6:.1f} MB")
+
+        for nombre, funcion in (("clasico", bucle_clasico), ("parser_chat", bucle_parser)):
+            inicio = time.perf_counter()
+            mensajes = funcion(ruta)
+            print(f"{nombre:<12} {time.perf_counter() - inicio:6.2f} s  ({mensajes} mensajes)")
+
+
+if __name__ == "__main__":
+    main()
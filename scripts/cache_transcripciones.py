@@ -0,0 +1,155 @@
+# cache_transcripciones.py
+# ===============================
+# Caché persistente de transcripciones direccionada por contenido
+# La clave es el hash del audio + los ajustes del reconocedor, así que
+# renombrar o mover un audio no obliga a transcribirlo otra vez.
+# ===============================
+
+import os
+import logging
+import hashlib
+import threading
+from collections import OrderedDict
+
+CARPETA_CACHE = os.path.join("..", "transcripciones", "cache")
+
+# Límites por defecto (se desaloja lo menos usado al superarlos)
+MAX_BYTES = 50 * 1024 * 1024
+MAX_ENTRADAS = 20000
+
+log = logging.getLogger(__name__)
+
+
+def hash_archivo(ruta: str, bloque: int = 1 << 20) -> str:
+    """
+    Calcula el SHA-256 del contenido de un archivo leyendo por bloques.
+    """
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+class CacheTranscripciones:
+    """
+    Guarda cada transcripción como <clave>.txt dentro de la carpeta de caché.
+    Mantiene un índice LRU en memoria (clave -> tamaño) que se reconstruye
+    desde el disco la primera vez que se usa, ordenado por fecha de acceso.
+    """
+
+    def __init__(self, carpeta: str = CARPETA_CACHE, max_bytes: int = MAX_BYTES,
+                 max_entradas: int = MAX_ENTRADAS, nombre: str = "Transcripciones"):
+        self.carpeta = carpeta
+        self.nombre = nombre
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self._indice = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    # -------------------------------
+    # Claves e índice
+    # -------------------------------
+    def clave(self, ruta_audio: str, ajustes: str) -> str:
+        """
+        Clave = SHA-256(contenido del audio) + SHA-256 de los ajustes del reconocedor
+        (y del preprocesado, p. ej. el VAD).
+        """
+        ajustes_hash = hashlib.sha256(ajustes.encode("utf-8")).hexdigest()[:16]
+        return f"{hash_archivo(ruta_audio)}-{ajustes_hash}"
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.carpeta, clave + ".txt")
+
+    def _cargar_indice(self):
+        if self._indice is not None:
+            return
+        os.makedirs(self.carpeta, exist_ok=True)
+        entradas = []
+        with os.scandir(self.carpeta) as it:
+            for e in it:
+                if e.is_file() and e.name.endswith(".txt"):
+                    st = e.stat()
+                    entradas.append((st.st_mtime, e.name[:-4], st.st_size))
+        entradas.sort()
+        self._indice = OrderedDict((clave, tam) for _, clave, tam in entradas)
+        self._bytes = sum(self._indice.values())
+
+    # -------------------------------
+    # Lectura / escritura
+    # -------------------------------
+    def obtener(self, clave: str):
+        """
+        Devuelve el texto guardado o None si no está en caché.
+        """
+        with self._lock:
+            self._cargar_indice()
+            if clave not in self._indice:
+                self.fallos += 1
+                return None
+            ruta = self._ruta(clave)
+            try:
+                with open(ruta, "r", encoding="utf-8") as f:
+                    texto = f.read()
+                os.utime(ruta)  # marcar como usado recientemente
+            except OSError:
+                self._bytes -= self._indice.pop(clave)
+                self.fallos += 1
+                return None
+            self._indice.move_to_end(clave)
+            self.aciertos += 1
+            return texto
+
+    def guardar(self, clave: str, texto: str):
+        """
+        Guarda una transcripción y desaloja las entradas más antiguas
+        si se superan los límites de tamaño.
+        """
+        datos = texto.encode("utf-8")
+        with self._lock:
+            self._cargar_indice()
+            ruta = self._ruta(clave)
+            temporal = ruta + ".tmp"
+            try:
+                with open(temporal, "wb") as f:
+                    f.write(datos)
+                os.replace(temporal, ruta)
+            except OSError as e:
+                log.error("No se pudo guardar en caché %s: %s", clave, e)
+                return
+            self._bytes += len(datos) - self._indice.pop(clave, 0)
+            self._indice[clave] = len(datos)
+            self._desalojar()
+
+    def _desalojar(self):
+        while self._indice and (self._bytes > self.max_bytes
+                                or len(self._indice) > self.max_entradas):
+            clave, tam = self._indice.popitem(last=False)
+            self._bytes -= tam
+            self.desalojos += 1
+            try:
+                os.remove(self._ruta(clave))
+            except OSError:
+                pass
+
+    def estadisticas(self) -> tuple:
+        return self.aciertos, self.fallos, self.desalojos
+
+    def sumar(self, estadisticas: tuple):
+        """
+        Suma los contadores de otro proceso (p. ej. un worker del driver multi-chat).
+        """
+        aciertos, fallos, desalojos = estadisticas
+        self.aciertos += aciertos
+        self.fallos += fallos
+        self.desalojos += desalojos
+
+    def resumen(self) -> str:
+        total = self.aciertos + self.fallos
+        tasa = (100.0 * self.aciertos / total) if total else 0.0
+        return (f"[CACHE] {self.nombre}: {self.aciertos} aciertos, {self.fallos} fallos "
+                f"({tasa:.1f}% acierto), {self.desalojos} desalojadas")
@@ -2,8 +2,24 @@
 # ===============================
 # Diccionario de soportes y palabras clave
 # Función que clasifica un mensaje en un tipo de soporte
+# Dos motores (variable de entorno INFORME_CLASIFICADOR):
+# - "subcadena" (por defecto): primera categoría con una palabra clave dentro del mensaje
+#   (autómata Aho-Corasick si está pyahocorasick:  pip install pyahocorasick)
+# - "tokens": puntuación por palabras completas y frases, sin tildes
 # ===============================
 
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+from instrumentacion import perfil
+
+try:
+    import ahocorasick
+except ImportError:  # sin pyahocorasick se recorren las palabras clave una a una
+    ahocorasick = None
+
 tipos_soporte = {
     "Impresora y Cajon": ["impresora", "cajón", "cajon"],
     "UPS": ["ups"],
@@ -47,13 +63,246 @@ tipos_soporte = {
     "Adjunto (pendiente clasificar)": []
 }
 
+SOPORTE_PENDIENTE = "Adjunto (pendiente clasificar)"
+
+# Mensajes distintos recordados por motor ("ok", "gracias", ... se repiten mucho)
+TAM_MEMO = 50_000
+
+# Motor por subcadena con autómata: cuando ya hay una categoría candidata y
+# las más prioritarias suman a lo sumo PALABRAS_DIRECTAS palabras clave, se
+# prueban esas con `in` (búsqueda en C) en vez de seguir recorriendo el
+# autómata. En textos desde LARGO_TEXTO caracteres (transcripciones, OCR,
+# mensajes unidos) esas primeras categorías se prueban antes del autómata.
+PALABRAS_DIRECTAS = 8
+LARGO_TEXTO = 300
+
+regex_token = re.compile(r"[a-z0-9]+")
+
+
+def normalizar(texto: str) -> str:
+    """
+    Minúsculas y sin tildes ni diéresis ("Conexión" -> "conexion").
+    """
+    return unicodedata.normalize("NFKD", texto.lower()).encode("ascii", "ignore").decode("ascii")
+
+
+def tokenizar(texto: str) -> list:
+    return regex_token.findall(normalizar(texto))
+
+
+class _Motor:
+    """
+    Base de los motores: clasificar() pasa por una memoria LRU de mensajes.
+    """
+
+    def __init__(self, tipos: dict, pendiente: str = SOPORTE_PENDIENTE, tam_memo: int = TAM_MEMO):
+        self.categorias = list(tipos.keys())
+        self.pendiente = pendiente
+        self.clasificar = lru_cache(maxsize=tam_memo)(self._clasificar) if tam_memo else self._clasificar
+
+    def _clasificar(self, mensaje: str) -> str:
+        raise NotImplementedError
+
+    def clasificar_lote(self, mensajes) -> list:
+        """
+        Clasifica una secuencia de mensajes y devuelve la lista de soportes
+        en el mismo orden.
+        """
+        clasificar = self.clasificar
+        return [clasificar(m) for m in mensajes]
+
+
+class MotorClasificacion(_Motor):
+    """
+    Clasificador compilado una sola vez a partir de un diccionario de soportes.
+    Con pyahocorasick todas las palabras clave forman un autómata que recorre
+    cada mensaje una sola vez (ver PALABRAS_DIRECTAS); sin él se prueba
+    `palabra in mensaje` categoría por categoría hasta la primera que coincida.
+    Conserva la prioridad original: gana la primera categoría del diccionario
+    que tenga alguna palabra clave dentro del mensaje.
+    """
+
+    nombre = "subcadena"
+
+    def __init__(self, tipos: dict, pendiente: str = SOPORTE_PENDIENTE, tam_memo: int = TAM_MEMO):
+        super().__init__(tipos, pendiente, tam_memo)
+
+        # (índice, palabras clave) de cada categoría, en orden de prioridad, y
+        # palabra clave -> índice de la categoría más prioritaria que la usa
+        self._palabras = []
+        prioridad = {}
+        for indice, palabras in enumerate(tipos.values()):
+            palabras = tuple(p.lower() for p in palabras if p)
+            if palabras:
+                self._palabras.append((indice, palabras))
+            for palabra in palabras:
+                prioridad.setdefault(palabra, indice)
+
+        # Palabras clave de las categorías anteriores a cada índice y
+        # categorías que se prueban directamente en los textos largos
+        self._anteriores = [0] * (len(self.categorias) + 1)
+        for indice, palabras in enumerate(tipos.values()):
+            self._anteriores[indice + 1] = self._anteriores[indice] + len([p for p in palabras if p])
+        self._directas = sum(1 for n in self._anteriores[1:] if n <= PALABRAS_DIRECTAS)
+
+        self._automata = None
+        if ahocorasick is not None and prioridad:
+            automata = ahocorasick.Automaton()
+            for palabra, indice in prioridad.items():
+                automata.add_word(palabra, indice)
+            automata.make_automaton()
+            self._automata = automata
+
+    def _clasificar(self, mensaje: str) -> str:
+        """
+        Devuelve el tipo de soporte del mensaje o la categoría pendiente.
+        """
+        if not mensaje:
+            return self.pendiente
+        mensaje = mensaje.lower()
+        sin_categoria = len(self.categorias)
+        if self._automata is None:
+            mejor = self._primera(mensaje, 0, sin_categoria)
+        else:
+            mejor = self._buscar(mensaje)
+        if mejor == sin_categoria:
+            return self.pendiente
+        return self.categorias[mejor]
+
+    def _primera(self, mensaje: str, desde: int, hasta: int) -> int:
+        """
+        Índice de la primera categoría en [desde, hasta) con alguna palabra
+        clave dentro del mensaje (ya en minúsculas), o `hasta` si ninguna.
+        """
+        for indice, palabras in self._palabras:
+            if indice >= hasta:
+                break
+            if indice >= desde and any(p in mensaje for p in palabras):
+                return indice
+        return hasta
+
+    def _buscar(self, mensaje: str) -> int:
+        """
+        Índice de la categoría ganadora usando el autómata.
+        """
+        sin_categoria = len(self.categorias)
+        desde = 0
+        if len(mensaje) >= LARGO_TEXTO:
+            desde = self._directas
+            indice = self._primera(mensaje, 0, desde)
+            if indice < desde:
+                return indice
+        anteriores = self._anteriores
+        mejor = sin_categoria
+        for _, indice in self._automata.iter(mensaje):
+            if indice < mejor:
+                mejor = indice
+                if anteriores[mejor] - anteriores[desde] <= PALABRAS_DIRECTAS:
+                    # Solo pueden ganarle las categorías en [desde, mejor)
+                    return self._primera(mensaje, desde, mejor)
+        return mejor
+
+
+class MotorPuntuacion(_Motor):
+    """
+    Clasificador por tokens: respeta los límites de palabra ("red" ya no
+    coincide dentro de "credito" ni "ups" dentro de "groups").
+    Se precalcula un índice invertido {palabra o frase normalizada: [(categoría, peso)]}
+    donde el peso es el número de palabras de la clave (las frases son más
+    específicas). Cada mensaje suma puntos a todas sus categorías en una sola
+    pasada por sus tokens; gana la de más puntos y, en empate, la primera del
+    diccionario (la prioridad del motor por subcadena).
+    """
+    nombre = "tokens"
+
+    def __init__(self, tipos: dict, pendiente: str = SOPORTE_PENDIENTE, tam_memo: int = TAM_MEMO):
+        super().__init__(tipos, pendiente, tam_memo)
+        indice = {}
+        largos = {}   # primer token -> largos de las frases que empiezan con él
+        for categoria, palabras in enumerate(tipos.values()):
+            for palabra in palabras:
+                tokens = tokenizar(palabra)
+                if not tokens:
+                    continue
+                clave = " ".join(tokens)
+                entradas = indice.setdefault(clave, [])
+                if all(c != categoria for c, _ in entradas):
+                    entradas.append((categoria, len(tokens)))
+                if len(tokens) > 1:
+                    largos.setdefault(tokens[0], set()).add(len(tokens))
+        self._indice = {clave: tuple(entradas) for clave, entradas in indice.items()}
+        self._largos = {token: sorted(ns) for token, ns in largos.items()}
+
+    def puntuar(self, mensaje: str) -> dict:
+        """
+        {índice de categoría: puntos} del mensaje.
+        """
+        tokens = tokenizar(mensaje)
+        indice, largos = self._indice, self._largos
+        puntos = {}
+        for i, token in enumerate(tokens):
+            for categoria, peso in indice.get(token, ()):
+                puntos[categoria] = puntos.get(categoria, 0) + peso
+            for n in largos.get(token, ()):
+                if i + n > len(tokens):
+                    break
+                for categoria, peso in indice.get(" ".join(tokens[i:i + n]), ()):
+                    puntos[categoria] = puntos.get(categoria, 0) + peso
+        return puntos
+
+    def _clasificar(self, mensaje: str) -> str:
+        if not mensaje:
+            return self.pendiente
+        puntos = self.puntuar(mensaje)
+        if not puntos:
+            return self.pendiente
+        return self.categorias[min(puntos, key=lambda c: (-puntos[c], c))]
+
+
+MOTORES = {
+    "subcadena": MotorClasificacion,
+    "tokens": MotorPuntuacion,
+}
+
+
+def crear_motor(nombre: str = None, tipos: dict = None) -> _Motor:
+    """
+    Motor indicado o el de INFORME_CLASIFICADOR ("subcadena" por defecto).
+    """
+    nombre = (nombre or os.environ.get("INFORME_CLASIFICADOR") or "subcadena").lower()
+    if nombre not in MOTORES:
+        raise ValueError(f"Clasificador desconocido: {nombre} (opciones: {', '.join(MOTORES)})")
+    return MOTORES[nombre](tipos_soporte if tipos is None else tipos)
+
+
+# Motor por defecto construido una vez al importar el módulo
+_motor = crear_motor()
+
+
+def usar_clasificador(nombre: str):
+    """
+    Cambia el motor de clasificar_soporte / clasificar_lote en este proceso
+    (y en los procesos hijos, que lo leen de INFORME_CLASIFICADOR).
+    """
+    global _motor
+    _motor = crear_motor(nombre)
+    os.environ["INFORME_CLASIFICADOR"] = _motor.nombre
+
+
+@perfil.medir("clasificacion", len)
 def clasificar_soporte(mensaje: str) -> str:
     """
     Clasifica un mensaje en un tipo de soporte según las palabras clave.
     Si no encuentra coincidencia, devuelve 'Adjunto (pendiente clasificar)'.
     """
-    mensaje = mensaje.lower()
-    for tipo, palabras in tipos_soporte.items():
-        if any(p in mensaje for p in palabras):
-            return tipo
-    return "Adjunto (pendiente clasificar)"
+    return _motor.clasificar(mensaje)
+
+
+def clasificar_lote(mensajes) -> list:
+    """
+    Clasifica todos los mensajes de un chat en una sola pasada.
+    Devuelve una lista de tipos de soporte en el mismo orden.
+    """
+    mensajes = list(mensajes)
+    with perfil.etapa("clasificacion", elementos=len(mensajes)):
+        return _motor.clasificar_lote(mensajes)
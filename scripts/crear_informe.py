@@ -1,18 +1,27 @@
 # crear_informe.py
 # ===============================
 # Script principal: procesa chats, audios, transcribe, clasifica y genera el informe
+#   py crear_informe.py                                        -> desde 2025 en adelante
+#   py crear_informe.py --desde 2025-03-01 --hasta 2025-03-31  -> solo ese rango de fechas
+#   py crear_informe.py --clasificador tokens                  -> clasificación por palabras completas
+#   py crear_informe.py --solo-texto                           -> solo los chats, sin audios
+# Las etapas pesadas (audio, Excel) importan sus módulos la primera vez que se usan.
 # ===============================
 
 import os
-import re
-import pandas as pd
+import logging
+import argparse
+from itertools import islice
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, date
 
-# Importar módulos auxiliares
-from transcribir import transcribir_audio
-from clasificar import clasificar_soporte, tipos_soporte
-from generar_excel import generar_excel
+# Importar módulos auxiliares (livianos; transcribir y generar_excel se cargan al usarse)
+from clasificar import clasificar_soporte, clasificar_lote, tipos_soporte, usar_clasificador, MOTORES
+from parser_chat import iterar_mensajes_rango, regex_audio
+from agregador import AgregadorSoportes
+from instrumentacion import configurar_log
+
+log = logging.getLogger("crear_informe")
 
 # -------------------------------
 # Configuración de rutas y formatos
@@ -20,7 +29,6 @@ from generar_excel import generar_excel
 RUTA_CHATS = "../chats_soporte"
 RUTA_AUDIOS = "../chats_soporte"   # donde están tus PTT-*.opus
 RUTA_TRANSCRIPCIONES = Path("transcripciones")
-RUTA_TRANSCRIPCIONES.mkdir(exist_ok=True)
 
 # Traducción de meses inglés → español
 meses_map = {
@@ -30,103 +38,132 @@ meses_map = {
     "October": "Octubre", "November": "Noviembre", "December": "Diciembre"
 }
 
-# Regex para audios PTT-YYYYMMDD-WA####.opus
-regex_audio = re.compile(r"PTT-(\d{8})-WA\d+\.opus", re.IGNORECASE)
+# Mensajes clasificados por bloque (memoria acotada aunque el chat sea enorme)
+TAM_BLOQUE = 5000
 
-# Lista de resultados finales
-resultados = []
 
 # -------------------------------
 # Procesar todos los audios encontrados
 # -------------------------------
-for archivo in os.listdir(RUTA_AUDIOS):
-    match = regex_audio.match(archivo)
-    if not match:
-        continue
-
-    fecha_str = match.group(1)  # ejemplo "20250904"
-    fecha = datetime.strptime(fecha_str, "%Y%m%d").date()
+def procesar_audios(agregado: AgregadorSoportes, desde: date, hasta: date = None) -> int:
+    """
+    Transcribe y clasifica los audios del rango (por la fecha del nombre).
+    Devuelve cuántos se procesaron.
+    """
+    transcribir_audio = None
+    procesados = 0
+    for archivo in os.listdir(RUTA_AUDIOS):
+        match = regex_audio.match(archivo)
+        if not match:
+            continue
+
+        fecha_str = match.group(1)  # ejemplo "20250904"
+        fecha = datetime.strptime(fecha_str, "%Y%m%d").date()
+
+        # Solo tomar audios del rango (por la fecha del nombre, antes de transcribir)
+        if fecha < desde or (hasta is not None and fecha > hasta):
+            continue
+
+        if transcribir_audio is None:
+            # La pila de audio (speech_recognition, numpy, reconocedor) se carga con el primer audio
+            from transcribir import transcribir_audio
+            RUTA_TRANSCRIPCIONES.mkdir(exist_ok=True)
+
+        ruta_audio = os.path.join(RUTA_AUDIOS, archivo)
+        log.debug("Procesando audio: %s (%s)", archivo, fecha)
+
+        # -------------------------------
+        # Transcripción
+        # -------------------------------
+        transcripcion = transcribir_audio(ruta_audio)
+
+        # Guardar transcripción en carpeta
+        archivo_txt = RUTA_TRANSCRIPCIONES / f"{Path(archivo).stem}.txt"
+        with open(archivo_txt, "w", encoding="utf-8") as f:
+            f.write(transcripcion)
+
+        log.debug("Transcripción guardada en %s", archivo_txt)
+
+        # -------------------------------
+        # Clasificación
+        # -------------------------------
+        soporte = clasificar_soporte(transcripcion)
+        if soporte is None:
+            soporte = "Adjunto (pendiente clasificar)"
+
+        # Guardar resultado
+        agregado.agregar(soporte, fecha)
+        procesados += 1
+    return procesados
 
-    # Solo tomar audios de 2025 en adelante
-    if fecha.year < 2025:
-        continue
 
-    ruta_audio = os.path.join(RUTA_AUDIOS, archivo)
-    print(f"[DEBUG] Procesando audio: {archivo} ({fecha})")
+# -------------------------------
+# Procesar también los chats de texto
+# -------------------------------
+def procesar_chats(agregado: AgregadorSoportes, desde: date, hasta: date = None):
+    for archivo in os.listdir(RUTA_CHATS):
+        if not archivo.endswith(".txt"):
+            continue
+
+        ruta_txt = os.path.join(RUTA_CHATS, archivo)
+        log.debug("Procesando chat: %s", archivo)
+
+        # Saltar mensajes de soporte
+        mensajes = (m for m in iterar_mensajes_rango(ruta_txt, desde, hasta) if not m.es_de_soporte)
+
+        # Clasificar el chat por bloques con el motor compilado
+        while True:
+            bloque = list(islice(mensajes, TAM_BLOQUE))
+            if not bloque:
+                break
+            for msg, soporte in zip(bloque, clasificar_lote(m.cuerpo for m in bloque)):
+                agregado.agregar(soporte, msg.fecha)
+
+
+def main():
+    # Rango de fechas a contar
+    parser = argparse.ArgumentParser(description="Genera informe_soportes.xlsx a partir de audios y chats.")
+    parser.add_argument("--desde", type=date.fromisoformat, default=date(2025, 1, 1),
+                        help="Primera fecha a contar, AAAA-MM-DD (por defecto %(default)s)")
+    parser.add_argument("--hasta", type=date.fromisoformat, default=None,
+                        help="Última fecha a contar, AAAA-MM-DD (por defecto sin límite)")
+    parser.add_argument("--clasificador", choices=MOTORES, default=None,
+                        help="Motor de clasificación (por defecto INFORME_CLASIFICADOR o 'subcadena')")
+    parser.add_argument("--solo-texto", action="store_true",
+                        help="Clasificar solo los mensajes de texto, sin transcribir audios "
+                             "(no se carga speech_recognition ni el reconocedor)")
+    parser.add_argument("--debug", action="store_true", help="Mostrar los mensajes de depuración")
+    args = parser.parse_args()
+    configurar_log(logging.DEBUG if args.debug else logging.INFO)
+    if args.clasificador:
+        usar_clasificador(args.clasificador)
+
+    # Conteos finales por (soporte, mes, año)
+    agregado = AgregadorSoportes(tipos_soporte)
+
+    audios = 0 if args.solo_texto else procesar_audios(agregado, args.desde, args.hasta)
+    procesar_chats(agregado, args.desde, args.hasta)
 
     # -------------------------------
-    # Transcripción
+    # Depuración antes de generar Excel
     # -------------------------------
-    transcripcion = transcribir_audio(ruta_audio)
-
-    # Guardar transcripción en carpeta
-    archivo_txt = RUTA_TRANSCRIPCIONES / f"{Path(archivo).stem}.txt"
-    with open(archivo_txt, "w", encoding="utf-8") as f:
-        f.write(transcripcion)
-
-    print(f"[DEBUG] Transcripción guardada en {archivo_txt}")
+    print("\nPrimeros registros obtenidos:\n")
+    for fecha, soporte in agregado.muestra:
+        print(f"  {fecha}  {soporte}")
+    print("\nConteo por Tipo de Soporte:\n")
+    for soporte, n in agregado.por_soporte().most_common():
+        print(f"  {soporte:<40} {n}")
 
     # -------------------------------
-    # Clasificación
+    # Generar Excel final (pandas se carga recién aquí)
     # -------------------------------
-    soporte = clasificar_soporte(transcripcion)
-    if soporte is None:
-        soporte = "Adjunto (pendiente clasificar)"
-
-    # Guardar resultado
-    resultados.append({
-        "Fecha": fecha,
-        "Mes": meses_map.get(fecha.strftime("%B"), fecha.strftime("%B")),
-        "Año": fecha.year,
-        "Tipo de Soporte": soporte
-    })
+    from generar_excel import generar_excel
+    generar_excel(agregado, tipos_soporte, meses_map)
+    print("✅ Informe generado: informe_soportes.xlsx")
+    if audios:
+        from transcribir import resumen_cache
+        print(resumen_cache())
 
-# -------------------------------
-# Procesar también los chats de texto
-# -------------------------------
-for archivo in os.listdir(RUTA_CHATS):
-    if not archivo.endswith(".txt"):
-        continue
-
-    ruta_txt = os.path.join(RUTA_CHATS, archivo)
-    print(f"\n[DEBUG] Procesando chat: {archivo}")
-
-    with open(ruta_txt, "r", encoding="utf-8") as f:
-        for linea in f:
-            # Saltar mensajes de soporte
-            if " - Soporte donucol:" in linea:
-                continue
-
-            # Intentar extraer fecha
-            try:
-                fecha = datetime.strptime(linea.split(",")[0], "%d/%m/%Y").date()
-            except Exception:
-                continue
-
-            if fecha.year < 2025:
-                continue
-
-            texto = linea.lower()
-            soporte = clasificar_soporte(texto) or "Adjunto (pendiente clasificar)"
-
-            resultados.append({
-                "Fecha": fecha,
-                "Mes": meses_map.get(fecha.strftime("%B"), fecha.strftime("%B")),
-                "Año": fecha.year,
-                "Tipo de Soporte": soporte
-            })
 
-# -------------------------------
-# Depuración antes de generar Excel
-# -------------------------------
-df_debug = pd.DataFrame(resultados)
-print("\nPrimeros 20 registros obtenidos:\n")
-print(df_debug.head(20))
-print("\nConteo por Tipo de Soporte:\n")
-print(df_debug["Tipo de Soporte"].value_counts())
-
-# -------------------------------
-# Generar Excel final
-# -------------------------------
-generar_excel(resultados, tipos_soporte, meses_map)
-print("✅ Informe generado: informe_soportes.xlsx")
+if __name__ == "__main__":
+    main()
@@ -10,21 +10,32 @@ def get_opus_datetime(ruta_audio):
     Extrae la fecha/hora del metadato creation_time de un archivo .opus
     Si no encuentra, usa la fecha/hora de modificación del archivo.
     """
+    return get_opus_metadatos(ruta_audio)[0]
+
+
+def get_opus_metadatos(ruta_audio):
+    """
+    Lee el archivo .opus una sola vez y devuelve (fecha/hora, duración en segundos).
+    La fecha sale de creation_time/DATE o, si no hay, de la fecha de modificación.
+    La duración es None si no se pudo leer.
+    """
+    duracion = None
     try:
         audio = OggOpus(ruta_audio)
+        duracion = audio.info.length
         tags = audio.tags
         if tags:
             # WhatsApp suele usar 'creation_time'
             if 'creation_time' in tags:
                 # convertir a datetime
-                return datetime.fromisoformat(tags['creation_time'][0].replace('Z',''))
+                return datetime.fromisoformat(tags['creation_time'][0].replace('Z','')), duracion
             elif 'DATE' in tags:
-                return datetime.fromisoformat(tags['DATE'][0])
+                return datetime.fromisoformat(tags['DATE'][0]), duracion
     except Exception as e:
         print(f"Error leyendo metadatos de {ruta_audio}: {e}")
 
     # Si no hay metadato, usar fecha/hora de modificación
-    return datetime.fromtimestamp(os.path.getmtime(ruta_audio))
+    return datetime.fromtimestamp(os.path.getmtime(ruta_audio)), duracion
 
 
 if __name__ == "__main__":
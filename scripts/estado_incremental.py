@@ -0,0 +1,126 @@
+# estado_incremental.py
+# ===============================
+# Estado persistente para el modo incremental
+# Guarda por cada chat el byte hasta donde se procesó, el último mensaje
+# y los conteos parciales, para que la siguiente ejecución solo lea lo nuevo
+# (o para reanudar una ejecución que se interrumpió).
+# ===============================
+
+import os
+import json
+import logging
+import hashlib
+
+from agregador import AgregadorSoportes
+
+# Un archivo JSON por chat, así varios procesos pueden avanzar a la vez
+CARPETA_ESTADO = "estado_informe"
+
+# Bytes previos al offset que se comparan para detectar que el chat cambió
+BYTES_HUELLA = 4096
+
+log = logging.getLogger(__name__)
+
+
+def _huella(ruta_txt: str, offset: int) -> str:
+    """
+    SHA-256 de los BYTES_HUELLA bytes anteriores a `offset`.
+    Si la exportación nueva no conserva ese tramo, hay que empezar de cero.
+    """
+    inicio = max(0, offset - BYTES_HUELLA)
+    with open(ruta_txt, "rb") as f:
+        f.seek(inicio)
+        return hashlib.sha256(f.read(offset - inicio)).hexdigest()
+
+
+class EstadoIncremental:
+    """
+    Almacén JSON con un archivo por chat dentro de `carpeta`:
+    {chat, offset, huella, ultimo_mensaje, conteos, registros}.
+    """
+
+    def __init__(self, carpeta: str = CARPETA_ESTADO):
+        self.carpeta = carpeta
+        self.chats = {}
+        os.makedirs(carpeta, exist_ok=True)
+
+    def _ruta(self, ruta_txt: str) -> str:
+        clave = hashlib.sha1(os.path.abspath(ruta_txt).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.carpeta, clave + ".json")
+
+    def _entrada(self, ruta_txt: str):
+        ruta = self._ruta(ruta_txt)
+        if ruta not in self.chats:
+            entrada = None
+            if os.path.exists(ruta):
+                try:
+                    with open(ruta, "r", encoding="utf-8") as f:
+                        entrada = json.load(f)
+                except (OSError, ValueError) as e:
+                    log.warning("Estado de %s ilegible (%s), se empieza de cero", os.path.basename(ruta_txt), e)
+            self.chats[ruta] = entrada
+        return self.chats[ruta]
+
+    def punto_de_partida(self, ruta_txt: str, tipos_soporte=()):
+        """
+        Devuelve (offset, AgregadorSoportes con los conteos previos) para reanudar el chat.
+        Si no hay estado o el archivo ya no coincide con lo procesado,
+        devuelve (0, agregador vacío) para procesarlo completo.
+        """
+        entrada = self._entrada(ruta_txt)
+        if not entrada:
+            return 0, AgregadorSoportes(tipos_soporte)
+        offset = entrada["offset"]
+        try:
+            valido = (os.path.getsize(ruta_txt) >= offset
+                      and _huella(ruta_txt, offset) == entrada["huella"])
+        except OSError:
+            valido = False
+        if not valido:
+            log.info("%s cambió desde la última ejecución, se procesa completo", os.path.basename(ruta_txt))
+            return 0, AgregadorSoportes(tipos_soporte)
+        return offset, self.conteos(ruta_txt, tipos_soporte)
+
+    def conteos(self, ruta_txt: str, tipos_soporte=()) -> AgregadorSoportes:
+        entrada = self._entrada(ruta_txt)
+        if not entrada:
+            return AgregadorSoportes(tipos_soporte)
+        return AgregadorSoportes.desde_lista(entrada["conteos"], tipos_soporte)
+
+    def marca_registros(self, ruta_txt: str):
+        """
+        Marca de la exportación de registros en el último checkpoint (ver ExportadorRegistros.volcar).
+        """
+        return (self._entrada(ruta_txt) or {}).get("registros")
+
+    def actualizar(self, ruta_txt: str, offset: int, ultimo_mensaje, conteos: AgregadorSoportes,
+                   registros=None):
+        """
+        Registra un checkpoint del chat y lo persiste en disco.
+        `registros` es la marca de la exportación de registros hasta este punto.
+        """
+        if ultimo_mensaje is None:
+            ultimo_mensaje = (self._entrada(ruta_txt) or {}).get("ultimo_mensaje")
+        entrada = {
+            "chat": os.path.abspath(ruta_txt),
+            "offset": offset,
+            "huella": _huella(ruta_txt, offset),
+            "ultimo_mensaje": ultimo_mensaje,
+            "conteos": conteos.a_lista(),
+            "registros": registros,
+        }
+        ruta = self._ruta(ruta_txt)
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+        self.chats[ruta] = entrada
+
+    def olvidar(self, ruta_txt: str):
+        """
+        Borra el estado del chat: la próxima vez se procesa completo.
+        """
+        ruta = self._ruta(ruta_txt)
+        self.chats[ruta] = None
+        if os.path.exists(ruta):
+            os.remove(ruta)
@@ -0,0 +1,181 @@
+# exportar_registros.py
+# ===============================
+# Exportación de los registros clasificados (un registro por mensaje contado)
+# para análisis en herramientas de BI. Se escribe en streaming mientras se
+# procesa el chat, un archivo por chat: registros_<chat>.csv / .parquet
+# Cuando el chat se retoma desde un checkpoint (--incremental) las filas nuevas
+# se agregan: al final del CSV, o en Parquet como registros_<chat>.parte-<fecha>.parquet
+# (leer la carpeta como dataset: registros_<chat>*.parquet). En Parquet cada
+# TAM_GRUPO_PARQUET filas se cierra el archivo y se sigue en una parte nueva:
+# solo un archivo cerrado es legible, y solo entonces se guarda un checkpoint.
+# Cada checkpoint guarda la marca de volcar() (bytes del CSV o última parte
+# Parquet cerrada); al retomar se descarta lo exportado después de ella.
+# Parquet necesita pyarrow:  pip install pyarrow
+# ===============================
+
+import os
+import csv
+from datetime import datetime
+
+COLUMNAS = ["chat", "fecha", "hora", "remitente", "tipo", "adjunto", "soporte", "texto"]
+
+# Filas acumuladas antes de escribir (y cerrar) un archivo Parquet
+TAM_GRUPO_PARQUET = 50_000
+
+# Un Parquet sin estos 4 bytes al final no se cerró (proceso interrumpido)
+FIRMA_PARQUET = b"PAR1"
+
+FORMATOS = ("csv", "parquet")
+
+
+class ExportadorRegistros:
+    """
+    Recibe (mensaje, soporte, texto) por cada mensaje contado y los escribe
+    en `carpeta`. Se usa como context manager para cerrar el archivo.
+    El archivo se abre con abrir() (o con la primera fila, reemplazando lo anterior).
+    """
+
+    def __init__(self, carpeta: str, ruta_txt: str, formato: str = "csv"):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de registros desconocido: {formato} (opciones: {', '.join(FORMATOS)})")
+        os.makedirs(carpeta, exist_ok=True)
+        self.carpeta = carpeta
+        self.chat = os.path.splitext(os.path.basename(ruta_txt))[0]
+        self.formato = formato
+        self.ruta = os.path.join(carpeta, f"registros_{self.chat}.{formato}")
+        self.filas = 0
+        self._abierto = False
+        self._escritor = None
+        self._partes_cerradas = 0
+        self._ultimo_cerrado = None
+
+    def _partes_parquet(self) -> list:
+        prefijo = f"registros_{self.chat}.parte-"
+        return [os.path.join(self.carpeta, n) for n in os.listdir(self.carpeta)
+                if n.startswith(prefijo) and n.endswith(".parquet")]
+
+    def _nueva_parte(self) -> str:
+        marca = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        return os.path.join(self.carpeta, f"registros_{self.chat}.parte-{marca}.parquet")
+
+    @staticmethod
+    def _parquet_cerrado(ruta: str) -> bool:
+        try:
+            with open(ruta, "rb") as f:
+                f.seek(-len(FIRMA_PARQUET), os.SEEK_END)
+                return f.read() == FIRMA_PARQUET
+        except OSError:
+            return False
+
+    def abrir(self, anexar: bool = False, marca=None):
+        """
+        Con `anexar` las filas se suman a lo ya exportado del chat (el proceso
+        retoma desde un checkpoint); si no, la exportación se reemplaza entera.
+        `marca` es la de volcar() guardada en ese checkpoint: lo exportado
+        después (una ejecución interrumpida) se descarta.
+        """
+        if self._abierto:
+            return
+        self._abierto = True
+        if self.formato == "parquet":
+            import pyarrow as pa
+            self._pa = pa
+            self._esquema = pa.schema([(c, pa.string()) for c in COLUMNAS])
+            self._pendientes = {c: [] for c in COLUMNAS}
+            if anexar:
+                # Las partes sin cerrar o posteriores a la marca son de después
+                # del checkpoint: se vuelven a escribir
+                base = os.path.basename(self.ruta)
+                cerradas = [base]
+                for parte in sorted(self._partes_parquet()):
+                    nombre = os.path.basename(parte)
+                    if not self._parquet_cerrado(parte) or (marca is not None and (marca == base or nombre > marca)):
+                        os.remove(parte)
+                    else:
+                        cerradas.append(nombre)
+                self._ultimo_cerrado = cerradas[-1]
+                # Parquet no admite agregar: una parte nueva, creada solo si hay filas
+                self.ruta = self._nueva_parte()
+            else:
+                for parte in self._partes_parquet():
+                    os.remove(parte)
+                self._crear_escritor_parquet()
+            return
+        anexar = anexar and os.path.exists(self.ruta)
+        if anexar and isinstance(marca, int) and os.path.getsize(self.ruta) > marca:
+            os.truncate(self.ruta, marca)
+        self._archivo = open(self.ruta, "a" if anexar else "w", encoding="utf-8", newline="")
+        self._escritor = csv.writer(self._archivo)
+        if not anexar:
+            self._escritor.writerow(COLUMNAS)
+
+    def _crear_escritor_parquet(self):
+        import pyarrow.parquet as pq
+        if self._partes_cerradas:
+            # Tras cerrar un archivo, las filas siguientes van a una parte nueva
+            self.ruta = self._nueva_parte()
+        self._escritor = pq.ParquetWriter(self.ruta, self._esquema)
+
+    def agregar(self, msg, soporte: str, texto: str = None):
+        if not self._abierto:
+            self.abrir()
+        fila = (self.chat, msg.fecha.isoformat(), msg.hora or "", msg.remitente or "",
+                msg.adjunto or "texto", msg.nombre_adjunto or "", soporte,
+                msg.cuerpo if texto is None else texto)
+        self.filas += 1
+        if self.formato == "csv":
+            self._escritor.writerow(fila)
+            return
+        for columna, valor in zip(COLUMNAS, fila):
+            self._pendientes[columna].append(valor)
+        if len(self._pendientes["chat"]) >= TAM_GRUPO_PARQUET:
+            self._volcar_parquet()
+
+    def _volcar_parquet(self, cerrar: bool = True):
+        if self._pendientes["chat"]:
+            if self._escritor is None:
+                self._crear_escritor_parquet()
+            self._escritor.write_table(self._pa.table(self._pendientes, schema=self._esquema))
+            self._pendientes = {c: [] for c in COLUMNAS}
+        if cerrar and self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+            self._partes_cerradas += 1
+            self._ultimo_cerrado = os.path.basename(self.ruta)
+
+    def volcar(self, final: bool = False):
+        """
+        Deja en disco lo recibido hasta ahora y devuelve la marca para el
+        checkpoint (abrir(anexar=True, marca=...) descarta lo posterior), o
+        None si todavía no se puede guardar uno. CSV: vacía el búfer, marca =
+        bytes del archivo. Parquet: solo justo después de cerrar una parte
+        (con `final`, al terminar el chat, se cierra ya), marca = esa parte.
+        """
+        if not self._abierto:
+            return None
+        if self.formato == "csv":
+            self._archivo.flush()
+            return os.fstat(self._archivo.fileno()).st_size
+        if final:
+            self._volcar_parquet()
+        if self._escritor is None and not self._pendientes["chat"]:
+            return self._ultimo_cerrado
+        return None
+
+    def cerrar(self) -> str:
+        if not self._abierto:
+            self.abrir()
+        if self.formato == "parquet":
+            self._volcar_parquet(cerrar=False)
+            if self._escritor is not None:
+                self._escritor.close()
+        else:
+            self._archivo.close()
+        return self.ruta
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
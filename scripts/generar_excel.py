@@ -3,40 +3,219 @@
 # Genera un archivo Excel con el conteo de soportes por mes
 # ===============================
 
+import os
+
+import numpy as np
 import pandas as pd
 
-def generar_excel(resultados, tipos_soporte, meses_map):
+from agregador import AgregadorSoportes
+from instrumentacion import perfil
+
+COLUMNA_SOPORTE = "Tipo de Soporte"
+COLUMNA_MES = "Mes"
+COLUMNA_CANTIDAD = "Cantidad"
+
+
+def _a_columnas(resultados):
     """
-    Crea un archivo 'informe_soportes.xlsx' con los resultados clasificados.
+    Acepta una lista de dicts, un DataFrame o un dict de columnas
+    {"Tipo de Soporte": [...], "Mes": [...], "Cantidad": [...] (opcional)}
+    y devuelve (soportes, meses, cantidades) como arrays.
     """
-    df = pd.DataFrame(resultados)
-    if df.empty:
-        print("⚠️ No se encontraron soportes")
-        return
+    if isinstance(resultados, pd.DataFrame) or isinstance(resultados, dict):
+        columnas = resultados
+    else:
+        resultados = list(resultados)
+        columnas = {
+            COLUMNA_SOPORTE: [r[COLUMNA_SOPORTE] for r in resultados],
+            COLUMNA_MES: [r[COLUMNA_MES] for r in resultados],
+        }
+    soportes = np.asarray(columnas[COLUMNA_SOPORTE], dtype=object)
+    meses = np.asarray(columnas[COLUMNA_MES], dtype=object)
+    cantidades = columnas[COLUMNA_CANTIDAD] if COLUMNA_CANTIDAD in columnas else None
+    return soportes, meses, cantidades
+
 
-    # Meses en orden español
+def tabla_conteos(resultados, tipos_soporte, meses_map) -> pd.DataFrame:
+    """
+    Cuenta soportes por mes de forma vectorizada.
+    Soportes y meses se convierten a categóricos con el orden de
+    `tipos_soporte` y de los meses en español; los valores fuera de esas
+    categorías se descartan. Devuelve la matriz soportes × meses (enteros).
+    Con un AgregadorSoportes la matriz ya está contada y se usa tal cual.
+    """
     orden_meses = list(meses_map.values())
+    categorias = list(tipos_soporte.keys())
+    if isinstance(resultados, AgregadorSoportes):
+        return pd.DataFrame(
+            np.array(resultados.matriz(categorias), dtype=np.int64).reshape(len(categorias), 12),
+            index=pd.Index(categorias, name="SOPORTES"),
+            columns=orden_meses,
+        )
+
+    soportes, meses, cantidades = _a_columnas(resultados)
+
+    # Meses en inglés -> español (los que ya están en español quedan igual)
+    meses = pd.Series(meses, dtype=object).replace(meses_map)
+
+    codigo_soporte = pd.Categorical(soportes, categories=categorias).codes.astype(np.int64)
+    codigo_mes = pd.Categorical(meses, categories=orden_meses).codes.astype(np.int64)
+    validos = (codigo_soporte >= 0) & (codigo_mes >= 0)
 
-    # DataFrame base con todos los soportes y meses
-    base = pd.DataFrame(0, index=tipos_soporte.keys(), columns=orden_meses)
-    base.index.name = "SOPORTES"
+    # Equivale a un crosstab reindexado contra soportes × meses, en una sola pasada
+    pesos = None if cantidades is None else np.asarray(cantidades, dtype=np.int64)[validos]
+    celdas = codigo_soporte[validos] * len(orden_meses) + codigo_mes[validos]
+    conteo = np.bincount(celdas, weights=pesos, minlength=len(categorias) * len(orden_meses))
 
-    # Sumar valores reales
-    conteo = df.groupby(["Tipo de Soporte", "Mes"]).size()
-    for (soporte, mes), valor in conteo.items():
-        mes_esp = meses_map.get(mes, mes)
-        if soporte in base.index and mes_esp in base.columns:
-            base.at[soporte, mes_esp] += valor
+    tabla = pd.DataFrame(
+        conteo.astype(np.int64).reshape(len(categorias), len(orden_meses)),
+        index=pd.Index(categorias, name="SOPORTES"),
+        columns=orden_meses,
+    )
+    return tabla
+
+
+def nombre_informe(ruta_txt=None) -> str:
+    """
+    'informe_soportes_<chat>.xlsx' para un chat o 'informe_soportes.xlsx' en general.
+    """
+    if ruta_txt:
+        nombre = os.path.splitext(os.path.basename(ruta_txt))[0]
+        return f"informe_soportes_{nombre}.xlsx"
+    return "informe_soportes.xlsx"
+
+
+def _tabla_para_excel(tabla: pd.DataFrame) -> pd.DataFrame:
+    orden_meses = list(tabla.columns)
+    base = tabla.copy()
 
     # Convertir a DataFrame normal con SOPORTES como columna
     base.reset_index(inplace=True)
 
     # Añadir columna TOTAL
-    base["TOTAL"] = base[orden_meses].sum(axis=1)
+    base["TOTAL"] = base[orden_meses].to_numpy().sum(axis=1)
 
     # Reemplazar 0 con vacío para mejor legibilidad
-    base = base.replace(0, "")
+    return base.replace(0, "")
+
+
+@perfil.medir("excel", lambda tabla, ruta_salida: os.path.getsize(ruta_salida))
+def escribir_informe(tabla: pd.DataFrame, ruta_salida: str) -> str:
+    """
+    Escribe una matriz soportes × meses (ver tabla_conteos) como informe Excel.
+    """
+    _tabla_para_excel(tabla).to_excel(ruta_salida, index=False)
+    print(f"✅ Informe generado: {ruta_salida}")
+    return ruta_salida
+
+
+def _nombre_hoja(nombre: str, usados: set) -> str:
+    # Excel: máximo 31 caracteres y sin []:*?/\
+    limpio = "".join("_" if c in '[]:*?/\\' else c for c in nombre)[:31] or "Hoja"
+    candidato, n = limpio, 2
+    while candidato.lower() in usados:
+        sufijo = f" ({n})"
+        candidato = limpio[:31 - len(sufijo)] + sufijo
+        n += 1
+    usados.add(candidato.lower())
+    return candidato
+
+
+@perfil.medir("excel", lambda tablas, ruta_salida="informe_consolidado.xlsx": os.path.getsize(ruta_salida))
+def generar_consolidado(tablas: dict, ruta_salida: str = "informe_consolidado.xlsx") -> str:
+    """
+    Escribe en un solo libro una hoja 'Consolidado' con la suma de todas
+    las sedes y una hoja por sede. `tablas` es {nombre_sede: tabla_conteos}.
+    """
+    if not tablas:
+        print("⚠️ No hay tablas para consolidar")
+        return None
+
+    consolidado = sum(tablas.values())
+    usados = {"consolidado"}
+    with pd.ExcelWriter(ruta_salida) as writer:
+        _tabla_para_excel(consolidado).to_excel(writer, sheet_name="Consolidado", index=False)
+        for nombre, tabla in tablas.items():
+            _tabla_para_excel(tabla).to_excel(writer, sheet_name=_nombre_hoja(nombre, usados), index=False)
+    print(f"✅ Informe consolidado generado: {ruta_salida} ({len(tablas)} sedes)")
+    return ruta_salida
+
+
+class LibroInforme:
+    """
+    Libro único escrito en streaming con xlsxwriter (constant_memory):
+    una hoja 'Consolidado' al principio y una hoja por chat/sede, que se
+    escribe y se libera en cuanto llega su tabla. Las celdas son números
+    (el formato oculta los ceros en lugar de reemplazarlos por "").
+      with LibroInforme("informe_sedes.xlsx") as libro:
+          libro.agregar_hoja("Sede Norte", tabla)
+    Necesita xlsxwriter:  pip install xlsxwriter
+    """
+
+    def __init__(self, ruta_salida: str = "informe_sedes.xlsx"):
+        import xlsxwriter
+        self.ruta = ruta_salida
+        self._libro = xlsxwriter.Workbook(ruta_salida, {"constant_memory": True})
+        self._encabezado = self._libro.add_format({"bold": True})
+        self._numero = self._libro.add_format({"num_format": "0;-0;;@"})
+        # Se crea primero para que quede como la primera hoja; se llena al cerrar
+        self._hoja_consolidado = self._libro.add_worksheet("Consolidado")
+        self._usados = {"consolidado"}
+        self._consolidado = None
+        self.hojas = 0
+
+    def _escribir_tabla(self, hoja, tabla: pd.DataFrame):
+        columnas = [tabla.index.name or "SOPORTES", *tabla.columns, "TOTAL"]
+        hoja.write_row(0, 0, columnas, self._encabezado)
+        hoja.set_column(0, 0, max(len(str(s)) for s in [columnas[0], *tabla.index]) + 2)
+        valores = tabla.to_numpy(dtype=np.int64)
+        for fila, (soporte, conteos) in enumerate(zip(tabla.index, valores), start=1):
+            hoja.write_string(fila, 0, str(soporte))
+            hoja.write_row(fila, 1, [int(n) for n in conteos], self._numero)
+            hoja.write_number(fila, len(columnas) - 1, int(conteos.sum()), self._numero)
+
+    @perfil.medir("excel")
+    def agregar_hoja(self, nombre: str, tabla: pd.DataFrame) -> str:
+        """
+        Escribe la tabla de un chat en su propia hoja y la suma al consolidado.
+        """
+        hoja = self._libro.add_worksheet(_nombre_hoja(nombre, self._usados))
+        self._escribir_tabla(hoja, tabla)
+        self._consolidado = tabla.copy() if self._consolidado is None else self._consolidado.add(tabla, fill_value=0)
+        self.hojas += 1
+        return hoja.get_name()
+
+    @perfil.medir("excel")
+    def cerrar(self) -> str:
+        if self._consolidado is not None:
+            self._escribir_tabla(self._hoja_consolidado, self._consolidado)
+        self._libro.close()
+        print(f"✅ Informe consolidado generado: {self.ruta} ({self.hojas} sedes)")
+        return self.ruta
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+
+def generar_excel(resultados, tipos_soporte, meses_map, ruta_txt=None):
+    """
+    Crea un archivo Excel con los resultados clasificados
+    (lista de dicts, columnas o AgregadorSoportes).
+    Si se indica el chat de origen (`ruta_txt`), el archivo se llama
+    'informe_soportes_<chat>.xlsx'; si no, 'informe_soportes.xlsx'.
+    Devuelve la ruta generada o None si no hay datos.
+    """
+    if isinstance(resultados, AgregadorSoportes):
+        vacio = resultados.total == 0
+    else:
+        vacio = len(_a_columnas(resultados)[0]) == 0
+    if vacio:
+        print("⚠️ No se encontraron soportes")
+        return None
 
-    # Exportar a Excel
-    base.to_excel("informe_soportes.xlsx", index=False)
-    print("✅ Informe generado: informe_soportes.xlsx")
+    tabla = tabla_conteos(resultados, tipos_soporte, meses_map)
+    return escribir_informe(tabla, nombre_informe(ruta_txt))
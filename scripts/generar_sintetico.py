@@ -0,0 +1,153 @@
+# generar_sintetico.py
+# ===============================
+# Generador de exportaciones sintéticas de WhatsApp para benchmarks
+# Usa el vocabulario real de tipos_soporte y crea también los adjuntos
+# (PTT-*.opus e IMG-*.jpg de relleno) en la misma carpeta.
+#   py generar_sintetico.py --salida ../sintetico --lineas 100000
+#   py generar_sintetico.py --salida X --audios 0.05 --imagenes 0.02 --chats 3
+# ===============================
+
+import os
+import random
+import shutil
+import argparse
+import subprocess
+from datetime import date, timedelta
+
+from clasificar import tipos_soporte
+
+RELLENO = [
+    "buenos dias", "buenas tardes", "por favor", "me ayudan", "no funciona", "desde ayer",
+    "en el punto", "gracias", "ok", "quedo atento", "ya reinicie", "sigue igual", "urgente",
+]
+REMITENTES = ["Punto Centro", "Admin Sede Norte", "Cajero 2", "Auxiliar Bodega"]
+REMITENTE_SOPORTE = "Soporte donucol"
+
+# Cabeceras mínimas válidas para los adjuntos de relleno cuando no hay ffmpeg / Pillow
+OPUS_RELLENO = b"OggS" + bytes(60)
+JPG_RELLENO = b"\xff\xd8\xff\xe0" + bytes(16) + b"\xff\xd9"
+
+
+def _palabras_clave() -> list:
+    return [p for palabras in tipos_soporte.values() for p in palabras]
+
+
+def _texto(rnd: random.Random, claves: list) -> str:
+    partes = rnd.sample(RELLENO, rnd.randint(1, 3))
+    if rnd.random() < 0.7:
+        partes.insert(rnd.randint(0, len(partes)), rnd.choice(claves))
+    return " ".join(partes)
+
+
+def _plantilla_opus(carpeta: str) -> bytes:
+    """
+    1 s de tono codificado en opus si hay ffmpeg; si no, una cabecera de relleno.
+    """
+    ruta = os.path.join(carpeta, "_plantilla.opus")
+    try:
+        subprocess.run(
+            ["ffmpeg", "-y", "-f", "lavfi", "-i", "sine=frequency=440:duration=1",
+             "-ac", "1", "-c:a", "libopus", ruta],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True
+        )
+        with open(ruta, "rb") as f:
+            return f.read()
+    except Exception:
+        return OPUS_RELLENO
+    finally:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+
+def _plantilla_jpg() -> bytes:
+    try:
+        from io import BytesIO
+        from PIL import Image, ImageDraw
+        imagen = Image.new("RGB", (320, 240), "white")
+        ImageDraw.Draw(imagen).text((10, 10), "ERROR SAP - no responde", fill="black")
+        buffer = BytesIO()
+        imagen.save(buffer, "JPEG")
+        return buffer.getvalue()
+    except ImportError:
+        return JPG_RELLENO
+
+
+def generar_chat(ruta_txt: str, lineas: int, prop_audios: float = 0.03, prop_imagenes: float = 0.02,
+                 prop_soporte: float = 0.25, prop_multilinea: float = 0.05,
+                 inicio: date = date(2024, 6, 1), lineas_por_dia: int = 300, semilla: int = 7,
+                 carpeta_adjuntos: str = None) -> dict:
+    """
+    Escribe un chat sintético de `lineas` líneas en orden cronológico.
+    Si se indica `carpeta_adjuntos`, crea allí un archivo por cada adjunto citado.
+    Devuelve un resumen con lo generado.
+    """
+    rnd = random.Random(semilla)
+    claves = _palabras_clave()
+    opus = _plantilla_opus(carpeta_adjuntos) if carpeta_adjuntos else None
+    jpg = _plantilla_jpg() if carpeta_adjuntos else None
+    audios = imagenes = 0
+    dia = inicio
+    with open(ruta_txt, "w", encoding="utf-8") as f:
+        for i in range(lineas):
+            if i and i % lineas_por_dia == 0:
+                dia += timedelta(days=1)
+            r = rnd.random()
+            if i and r < prop_multilinea:
+                f.write(_texto(rnd, claves) + "\n")
+                continue
+            cabecera = f"{dia:%d/%m/%Y}, {rnd.randint(7, 19):02d}:{rnd.randint(0, 59):02d} - "
+            r = rnd.random()
+            if r < prop_audios:
+                audios += 1
+                nombre = f"PTT-{dia:%Y%m%d}-WA{audios:04d}.opus"
+                f.write(f"{cabecera}{rnd.choice(REMITENTES)}: {nombre} (archivo adjunto)\n")
+                contenido = opus
+            elif r < prop_audios + prop_imagenes:
+                imagenes += 1
+                nombre = f"IMG-{dia:%Y%m%d}-WA{imagenes:04d}.jpg"
+                f.write(f"{cabecera}{rnd.choice(REMITENTES)}: {nombre} (archivo adjunto)\n")
+                contenido = jpg
+            else:
+                remitente = REMITENTE_SOPORTE if rnd.random() < prop_soporte else rnd.choice(REMITENTES)
+                f.write(f"{cabecera}{remitente}: {_texto(rnd, claves)}\n")
+                continue
+            if carpeta_adjuntos:
+                with open(os.path.join(carpeta_adjuntos, nombre), "wb") as fa:
+                    fa.write(contenido)
+    return {"ruta": ruta_txt, "lineas": lineas, "audios": audios, "imagenes": imagenes,
+            "desde": inicio.isoformat(), "hasta": dia.isoformat()}
+
+
+def generar_exportacion(carpeta: str, chats: int = 1, **opciones) -> list:
+    """
+    Crea `chats` chats sintéticos (Sede_1.txt, ...) con sus adjuntos en `carpeta`.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    resumenes = []
+    for n in range(1, chats + 1):
+        ruta = os.path.join(carpeta, f"Sede_{n}.txt")
+        opciones_chat = dict(opciones, semilla=opciones.get("semilla", 7) + n)
+        resumenes.append(generar_chat(ruta, carpeta_adjuntos=carpeta, **opciones_chat))
+    return resumenes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera exportaciones sintéticas de WhatsApp.")
+    parser.add_argument("--salida", required=True, help="Carpeta donde se crean chats y adjuntos")
+    parser.add_argument("--lineas", type=int, default=100_000)
+    parser.add_argument("--chats", type=int, default=1)
+    parser.add_argument("--audios", type=float, default=0.03, help="Proporción de mensajes con audio")
+    parser.add_argument("--imagenes", type=float, default=0.02, help="Proporción de mensajes con imagen")
+    parser.add_argument("--limpiar", action="store_true", help="Borrar la carpeta de salida antes")
+    args = parser.parse_args()
+
+    if args.limpiar and os.path.isdir(args.salida):
+        shutil.rmtree(args.salida)
+    for r in generar_exportacion(args.salida, args.chats, lineas=args.lineas,
+                                 prop_audios=args.audios, prop_imagenes=args.imagenes):
+        print(f"[OK] {r['ruta']}: {r['lineas']} líneas, {r['audios']} audios, "
+              f"{r['imagenes']} imágenes ({r['desde']} → {r['hasta']})")
+
+
+if __name__ == "__main__":
+    main()
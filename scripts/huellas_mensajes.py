@@ -0,0 +1,225 @@
+# huellas_mensajes.py
+# ===============================
+# Deduplicación de mensajes entre exportaciones del mismo chat
+# Cuando un chat se exporta varias veces con ventanas que se solapan,
+# cada mensaje se cuenta (y cada audio se transcribe) una sola vez:
+# el primer archivo que lo procesa queda como su dueño y los demás lo saltan.
+# Huella = hash de (conversación, fecha, hora, remitente, cuerpo o adjunto,
+# n.º de repetición) guardado en SQLite (12 bytes por mensaje + id del chat dueño).
+# La conversación se deduce del nombre de la exportación sin fecha ni sufijo
+# de copia ("Sede 1 (2).txt", "Sede 1 2025-03-01.txt" -> "sede 1"): el mismo
+# mensaje enviado a varios grupos se cuenta en cada uno.
+# También se anota qué archivo saltó mensajes de qué dueño: si el dueño se
+# borra, ese archivo se vuelve a leer completo para quedarse con ellos.
+# ===============================
+
+import os
+import re
+import sqlite3
+import hashlib
+import logging
+
+from parser_chat import iterar_mensajes, buscar_offset_fecha
+
+log = logging.getLogger(__name__)
+
+RUTA_HUELLAS = os.path.join("estado_informe", "huellas.sqlite")
+
+# Mensajes por transacción (y máximo de parámetros por consulta IN)
+TAM_LOTE = 500
+
+# Sufijos que agregan las reexportaciones y copias al nombre del chat
+regex_copia = re.compile(r"(\s*\(\d+\)|[\s_-]*(copia|copy)(\s*\d+)?)$", re.IGNORECASE)
+regex_fecha_nombre = re.compile(r"\d{4}[-_.]?\d{2}[-_.]?\d{2}|\d{1,2}[-_.]\d{1,2}[-_.]\d{2,4}")
+
+
+def identidad_chat(ruta_txt: str) -> str:
+    """
+    Conversación a la que pertenece una exportación: el nombre del archivo
+    en minúsculas, sin fechas ni sufijos de copia.
+    """
+    nombre = os.path.splitext(os.path.basename(ruta_txt))[0]
+    nombre = regex_fecha_nombre.sub(" ", nombre)
+    anterior = None
+    while anterior != nombre:
+        anterior, nombre = nombre, regex_copia.sub("", nombre.strip(" _-"))
+    return " ".join(re.split(r"[\s_-]+", nombre.casefold())).strip()
+
+
+def huella_mensaje(msg, repeticion: int = 0, chat: str = "") -> bytes:
+    """
+    Hash compacto del mensaje dentro de la conversación `chat` (identidad_chat).
+    `repeticion` distingue mensajes idénticos enviados en el mismo minuto
+    dentro de un archivo ("ok", "ok").
+    """
+    contenido = msg.nombre_adjunto or msg.cuerpo
+    texto = (f"{chat}\x1f{msg.fecha.isoformat()}\x1f{msg.hora or ''}\x1f{msg.remitente or ''}"
+             f"\x1f{contenido}\x1f{repeticion}")
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=12).digest()
+
+
+class HuellasMensajes:
+    """
+    Conjunto persistente {huella: chat dueño}. Un mensaje es repetido si su
+    huella pertenece a OTRO archivo de la misma conversación que todavía
+    existe; volver a procesar el mismo archivo nunca se salta sus propios mensajes.
+    La tabla `saltos` guarda los pares (chat que saltó mensajes, chat dueño).
+    """
+
+    def __init__(self, ruta: str = RUTA_HUELLAS):
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        self.ruta = ruta
+        # Varios procesos (--paralelo) comparten el archivo: esperar el bloqueo
+        self._conexion = sqlite3.connect(ruta, timeout=60)
+        with self._conexion:
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS chats (id INTEGER PRIMARY KEY, ruta TEXT UNIQUE NOT NULL)")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS huellas (huella BLOB PRIMARY KEY, chat INTEGER NOT NULL) WITHOUT ROWID")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS saltos (chat INTEGER NOT NULL, dueno INTEGER NOT NULL, "
+                "PRIMARY KEY (chat, dueno)) WITHOUT ROWID")
+        self._ids = {}
+        self._existe = {}
+        self.omitidos = 0
+
+    def _id_chat(self, ruta_txt: str) -> int:
+        ruta = os.path.abspath(ruta_txt)
+        if ruta not in self._ids:
+            with self._conexion:
+                self._conexion.execute("INSERT OR IGNORE INTO chats (ruta) VALUES (?)", (ruta,))
+            self._ids[ruta] = self._conexion.execute("SELECT id FROM chats WHERE ruta = ?", (ruta,)).fetchone()[0]
+        return self._ids[ruta]
+
+    def _ruta_chat(self, id_chat: int):
+        fila = self._conexion.execute("SELECT ruta FROM chats WHERE id = ?", (id_chat,)).fetchone()
+        return fila[0] if fila else None
+
+    def _dueno_vigente(self, id_chat: int) -> bool:
+        """
+        True si el archivo dueño de la huella sigue existiendo.
+        """
+        if id_chat not in self._existe:
+            ruta = self._ruta_chat(id_chat)
+            self._existe[id_chat] = ruta is not None and os.path.exists(ruta)
+        return self._existe[id_chat]
+
+    def refrescar(self):
+        """
+        Olvida qué archivos existen (en --vigilar pueden borrarse entre pasadas).
+        """
+        self._existe.clear()
+
+    def perdio_duenos(self, ruta_txt: str) -> bool:
+        """
+        True si el chat saltó mensajes de un archivo que ya no existe: hay que
+        leerlo completo para quedarse con ellos (un checkpoint incremental ya
+        los dejó atrás). Se borran sus saltos; la nueva lectura los vuelve a anotar.
+        """
+        id_chat = self._id_chat(ruta_txt)
+        duenos = [d for (d,) in self._conexion.execute("SELECT dueno FROM saltos WHERE chat = ?", (id_chat,))]
+        if all(self._dueno_vigente(d) for d in duenos):
+            return False
+        with self._conexion:
+            self._conexion.execute("DELETE FROM saltos WHERE chat = ?", (id_chat,))
+        return True
+
+    def chats_que_saltaron(self, ruta_txt: str) -> list:
+        """
+        Rutas de los chats que saltaron mensajes cuyo dueño es `ruta_txt`
+        (al borrarlo, esos mensajes pasan a ellos).
+        """
+        fila = self._conexion.execute("SELECT id FROM chats WHERE ruta = ?",
+                                      (os.path.abspath(ruta_txt),)).fetchone()
+        if not fila:
+            return []
+        self._existe.pop(fila[0], None)
+        ids = [c for (c,) in self._conexion.execute("SELECT chat FROM saltos WHERE dueno = ?", fila)]
+        return [ruta for ruta in map(self._ruta_chat, ids) if ruta is not None]
+
+    def _reclamar(self, huellas: list, id_chat: int) -> list:
+        """
+        Registra las huellas para `id_chat` y devuelve, por cada una, si es
+        repetida (pertenece a otro chat vigente). Todo en una transacción.
+        """
+        with self._conexion:
+            self._conexion.executemany("INSERT OR IGNORE INTO huellas VALUES (?, ?)",
+                                       [(h, id_chat) for h in huellas])
+            marcas = ",".join("?" * len(huellas))
+            duenos = dict(self._conexion.execute(
+                f"SELECT huella, chat FROM huellas WHERE huella IN ({marcas})", huellas))
+            # Huellas de archivos que ya no están: pasan a este chat
+            huerfanas = [(id_chat, h) for h, c in duenos.items() if c != id_chat and not self._dueno_vigente(c)]
+            if huerfanas:
+                self._conexion.executemany("UPDATE huellas SET chat = ? WHERE huella = ?", huerfanas)
+                duenos.update((h, id_chat) for _, h in huerfanas)
+            otros = {c for c in duenos.values() if c != id_chat}
+            if otros:
+                self._conexion.executemany("INSERT OR IGNORE INTO saltos VALUES (?, ?)",
+                                           [(id_chat, c) for c in otros])
+        return [duenos[h] != id_chat for h in huellas]
+
+    @staticmethod
+    def _repeticiones_previas(ruta_txt: str, primero) -> dict:
+        """
+        Contador de repeticiones de los mensajes del mismo minuto que `primero`
+        anteriores a él en el archivo, para seguir numerando igual que una
+        lectura completa al retomar desde un checkpoint.
+        """
+        repeticiones = {}
+        if not primero.offset:
+            return repeticiones
+        for msg in iterar_mensajes(ruta_txt, buscar_offset_fecha(ruta_txt, primero.fecha)):
+            if msg.offset >= primero.offset:
+                break
+            if (msg.fecha, msg.hora) == (primero.fecha, primero.hora):
+                clave = (msg.fecha, msg.hora, msg.remitente, msg.nombre_adjunto or msg.cuerpo)
+                repeticiones[clave] = repeticiones.get(clave, 0) + 1
+        return repeticiones
+
+    def filtrar(self, mensajes, ruta_txt: str):
+        """
+        Devuelve los mensajes de `ruta_txt` que no se contaron ya desde
+        otra exportación, en el mismo orden. Si los mensajes empiezan a mitad
+        del archivo (checkpoint), la numeración de repeticiones sigue la del archivo.
+        """
+        id_chat = self._id_chat(ruta_txt)
+        conversacion = identidad_chat(ruta_txt)
+        repeticiones = None
+        lote = []
+        for msg in mensajes:
+            if repeticiones is None:
+                repeticiones = self._repeticiones_previas(ruta_txt, msg)
+            clave = (msg.fecha, msg.hora, msg.remitente, msg.nombre_adjunto or msg.cuerpo)
+            n = repeticiones.get(clave, 0)
+            repeticiones[clave] = n + 1
+            lote.append((msg, huella_mensaje(msg, n, conversacion)))
+            if len(lote) >= TAM_LOTE:
+                yield from self._no_repetidos(lote, id_chat)
+                lote = []
+                # La clave solo importa dentro del mismo minuto
+                if len(repeticiones) > 4 * TAM_LOTE:
+                    repeticiones = {k: v for k, v in repeticiones.items() if k[:2] == clave[:2]}
+        if lote:
+            yield from self._no_repetidos(lote, id_chat)
+
+    def _no_repetidos(self, lote: list, id_chat: int):
+        repetidos = self._reclamar([h for _, h in lote], id_chat)
+        for (msg, _), repetido in zip(lote, repetidos):
+            if repetido:
+                self.omitidos += 1
+            else:
+                yield msg
+
+    def olvidar(self, ruta_txt: str):
+        """
+        Borra las huellas de un chat (p. ej. para volver a repartirlas).
+        """
+        id_chat = self._id_chat(ruta_txt)
+        with self._conexion:
+            self._conexion.execute("DELETE FROM huellas WHERE chat = ?", (id_chat,))
+
+    def cerrar(self):
+        self._conexion.close()
@@ -0,0 +1,192 @@
+# indice_adjuntos.py
+# ===============================
+# Índice de adjuntos de la exportación (audios PTT-*, imágenes IMG-*, ...)
+# - Un solo recorrido con os.scandir que interpreta el nombre del archivo
+# - Metadatos (creación, duración) leídos en paralelo y solo cuando se piden
+# - Persistido en disco e invalidado por mtime y tamaño de cada archivo
+# Las consultas desde el bucle del chat son accesos O(1) a un dict.
+# ===============================
+
+import os
+import re
+import json
+import logging
+import hashlib
+import tempfile
+from datetime import datetime, date
+from concurrent.futures import ThreadPoolExecutor
+
+CARPETA_INDICES = "indice_adjuntos"
+
+log = logging.getLogger(__name__)
+
+# PTT-20250904-WA0008.opus / IMG-20250904-WA0001.jpg
+regex_nombre_adjunto = re.compile(r"^(PTT|IMG|VID|AUD|DOC)-(\d{8})-WA(\d+)\.(\w+)$", re.IGNORECASE)
+
+TIPOS = {"PTT": "audio", "AUD": "audio", "IMG": "imagen", "VID": "video", "DOC": "documento"}
+
+
+def _fecha_nombre(texto: str):
+    try:
+        return date(int(texto[:4]), int(texto[4:6]), int(texto[6:8])).isoformat()
+    except ValueError:
+        return None
+
+
+def _leer_metadatos(ruta: str, tipo: str) -> dict:
+    """
+    Lee fecha de creación y duración. Para audios usa datos_audios (mutagen);
+    para imágenes el EXIF si hay Pillow. Si no se puede, usa la fecha de modificación.
+    """
+    creacion = duracion = None
+    try:
+        if tipo == "audio" and ruta.lower().endswith(".opus"):
+            from datos_audios import get_opus_metadatos
+            creacion, duracion = get_opus_metadatos(ruta)
+        elif tipo == "imagen":
+            from PIL import Image
+            with Image.open(ruta) as imagen:
+                valor = imagen.getexif().get(306)  # DateTime
+            if valor:
+                creacion = datetime.strptime(valor, "%Y:%m:%d %H:%M:%S")
+    except Exception:
+        pass
+    if creacion is None:
+        creacion = datetime.fromtimestamp(os.path.getmtime(ruta))
+    return {"creacion": creacion.isoformat(), "duracion": duracion}
+
+
+class IndiceAdjuntos:
+    """
+    { nombre_archivo: {tipo, fecha, tamano, mtime, [creacion, duracion]} }
+    para una carpeta de exportación.
+    """
+
+    def __init__(self, carpeta: str, carpeta_indices: str = CARPETA_INDICES):
+        self.carpeta = carpeta
+        clave = hashlib.sha1(os.path.abspath(carpeta).encode("utf-8")).hexdigest()[:16]
+        self.ruta_indice = os.path.join(carpeta_indices, clave + ".json")
+        self.entradas = {}
+        self._cambios = False
+        self.construir()
+
+    # -------------------------------
+    # Construcción
+    # -------------------------------
+    def _cargar_persistido(self) -> dict:
+        try:
+            with open(self.ruta_indice, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def construir(self):
+        """
+        Recorre la carpeta una vez. Las entradas persistidas cuyo mtime y
+        tamaño no cambiaron conservan sus metadatos ya leídos.
+        """
+        previas = self._cargar_persistido()
+        entradas = {}
+        try:
+            it = os.scandir(self.carpeta)
+        except OSError as e:
+            log.error("No se pudo leer la carpeta de adjuntos %s: %s", self.carpeta, e)
+            it = None
+        if it is not None:
+            with it:
+                for e in it:
+                    m = regex_nombre_adjunto.match(e.name)
+                    if not m or not e.is_file():
+                        continue
+                    st = e.stat()
+                    previa = previas.get(e.name)
+                    if previa and previa["mtime"] == st.st_mtime and previa["tamano"] == st.st_size:
+                        entradas[e.name] = previa
+                        continue
+                    entradas[e.name] = {
+                        "tipo": TIPOS[m.group(1).upper()],
+                        "fecha": _fecha_nombre(m.group(2)),
+                        "tamano": st.st_size,
+                        "mtime": st.st_mtime,
+                    }
+                    self._cambios = True
+        if set(entradas) != set(previas):
+            self._cambios = True
+        self.entradas = entradas
+        self.guardar()
+
+    def guardar(self):
+        """
+        Persiste el índice. Con --paralelo varios procesos lo guardan a la vez:
+        cada uno escribe su propio temporal y el último os.replace gana.
+        Si no se puede guardar, el índice en memoria sigue sirviendo.
+        """
+        if not self._cambios:
+            return
+        carpeta = os.path.dirname(self.ruta_indice)
+        temporal = None
+        try:
+            os.makedirs(carpeta, exist_ok=True)
+            fd, temporal = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+            with open(fd, "w", encoding="utf-8") as f:
+                json.dump(self.entradas, f, ensure_ascii=False)
+            os.replace(temporal, self.ruta_indice)
+            self._cambios = False
+        except OSError as e:
+            log.warning("No se pudo guardar el índice de adjuntos %s: %s", self.ruta_indice, e)
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
+
+    # -------------------------------
+    # Consultas
+    # -------------------------------
+    def __contains__(self, nombre: str) -> bool:
+        return nombre in self.entradas
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def get(self, nombre: str):
+        return self.entradas.get(nombre)
+
+    def ruta(self, nombre: str):
+        """
+        Ruta completa del adjunto o None si no está en la carpeta.
+        """
+        return os.path.join(self.carpeta, nombre) if nombre in self.entradas else None
+
+    def metadatos(self, nombre: str):
+        """
+        Metadatos de un adjunto, leyéndolos del archivo solo la primera vez.
+        """
+        entrada = self.entradas.get(nombre)
+        if entrada is None:
+            return None
+        if "creacion" not in entrada:
+            entrada.update(_leer_metadatos(os.path.join(self.carpeta, nombre), entrada["tipo"]))
+            self._cambios = True
+        return entrada
+
+    def precargar_metadatos(self, nombres=None, workers: int = 8):
+        """
+        Lee en paralelo los metadatos que falten (de `nombres` o de todos) y persiste el índice.
+        """
+        faltan = [n for n in (nombres if nombres is not None else self.entradas)
+                  if n in self.entradas and "creacion" not in self.entradas[n]]
+        if faltan:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(self.metadatos, faltan))
+        self.guardar()
+
+
+_indices = {}
+
+
+def obtener_indice(carpeta: str) -> IndiceAdjuntos:
+    """
+    Índice de la carpeta, construido una sola vez por proceso.
+    """
+    clave = os.path.abspath(carpeta)
+    if clave not in _indices:
+        _indices[clave] = IndiceAdjuntos(carpeta)
+    return _indices[clave]
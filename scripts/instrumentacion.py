@@ -0,0 +1,209 @@
+# instrumentacion.py
+# ===============================
+# Perfilado por etapas y logging por niveles
+# - perfil: tiempo de pared, llamadas, bytes y percentiles de latencia por etapa
+#   (parseo, clasificación, decodificación, reconocimiento, OCR, Excel)
+# - Desactivado no mide nada: cada punto instrumentado solo consulta un booleano
+# - configurar_log(): los mensajes [DEBUG] solo se formatean si el nivel lo pide
+# ===============================
+
+import os
+import json
+import time
+import random
+import logging
+import functools
+from contextlib import contextmanager
+
+# Muestras de latencia que se guardan por etapa (muestreo de reservorio)
+MAX_MUESTRAS = 20000
+
+# Nombres de nivel en español, como los prefijos que ya usaban los prints
+logging.addLevelName(logging.WARNING, "ADVERTENCIA")
+
+
+def configurar_log(nivel=logging.INFO):
+    """
+    Salida de los loggers de los scripts: "[NIVEL] mensaje" por consola.
+    """
+    logging.basicConfig(level=nivel, format="[%(levelname)s] %(message)s", force=True)
+
+
+class EstadisticaEtapa:
+    __slots__ = ("llamadas", "elementos", "segundos", "bytes", "muestras", "_vistas")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.elementos = 0
+        self.segundos = 0.0
+        self.bytes = 0
+        self.muestras = []
+        self._vistas = 0
+
+    def registrar(self, segundos: float, elementos: int = 1, nbytes: int = 0):
+        self.llamadas += 1
+        self.elementos += elementos
+        self.segundos += segundos
+        self.bytes += nbytes
+        # Una muestra por elemento (en un lote, la latencia media del lote)
+        latencia = segundos / elementos if elementos else segundos
+        for _ in range(max(1, elementos)):
+            self._vistas += 1
+            if len(self.muestras) < MAX_MUESTRAS:
+                self.muestras.append(latencia)
+            else:
+                j = random.randrange(self._vistas)
+                if j < MAX_MUESTRAS:
+                    self.muestras[j] = latencia
+
+    def percentil(self, p: float) -> float:
+        if not self.muestras:
+            return 0.0
+        ordenadas = sorted(self.muestras)
+        return ordenadas[min(len(ordenadas) - 1, int(p / 100 * len(ordenadas)))]
+
+    def a_dict(self) -> dict:
+        return {
+            "llamadas": self.llamadas, "elementos": self.elementos,
+            "segundos": round(self.segundos, 6), "bytes": self.bytes,
+            "p50_ms": round(self.percentil(50) * 1000, 3),
+            "p90_ms": round(self.percentil(90) * 1000, 3),
+            "p99_ms": round(self.percentil(99) * 1000, 3),
+            "max_ms": round(max(self.muestras, default=0.0) * 1000, 3),
+        }
+
+    def sumar(self, otra: "EstadisticaEtapa"):
+        self.llamadas += otra.llamadas
+        self.elementos += otra.elementos
+        self.segundos += otra.segundos
+        self.bytes += otra.bytes
+        self._vistas += otra._vistas
+        espacio = MAX_MUESTRAS - len(self.muestras)
+        self.muestras.extend(otra.muestras[:espacio])
+
+
+class Perfil:
+    """
+    Acumula estadísticas por etapa mientras `activo` sea True.
+    Los datos de cada proceso se exportan con exportar() y se juntan con fusionar().
+    """
+
+    def __init__(self):
+        self.activo = False
+        self.etapas = {}
+
+    def activar(self, activo: bool = True):
+        self.activo = activo
+
+    def _etapa(self, nombre: str) -> EstadisticaEtapa:
+        etapa = self.etapas.get(nombre)
+        if etapa is None:
+            etapa = self.etapas[nombre] = EstadisticaEtapa()
+        return etapa
+
+    def registrar(self, nombre: str, segundos: float, elementos: int = 1, nbytes: int = 0):
+        if self.activo:
+            self._etapa(nombre).registrar(segundos, elementos, nbytes)
+
+    # -------------------------------
+    # Puntos de medición
+    # -------------------------------
+    @contextmanager
+    def etapa(self, nombre: str, elementos: int = 1, nbytes: int = 0):
+        """
+        with perfil.etapa("reconocimiento", elementos=len(lote)): ...
+        """
+        if not self.activo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._etapa(nombre).registrar(time.perf_counter() - inicio, elementos, nbytes)
+
+    def medir(self, nombre: str, bytes_de=None):
+        """
+        Decorador: mide cada llamada como un elemento de la etapa `nombre`.
+        `bytes_de(*args)` calcula los bytes procesados (p. ej. tamaño del archivo).
+        """
+        def decorador(funcion):
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                if not self.activo:
+                    return funcion(*args, **kwargs)
+                inicio = time.perf_counter()
+                try:
+                    return funcion(*args, **kwargs)
+                finally:
+                    segundos = time.perf_counter() - inicio
+                    nbytes = 0
+                    if bytes_de is not None:
+                        try:
+                            nbytes = bytes_de(*args)
+                        except (OSError, TypeError):
+                            pass
+                    self._etapa(nombre).registrar(segundos, 1, nbytes)
+            return envoltura
+        return decorador
+
+    def iterar(self, nombre: str, iterable, bytes_de=None):
+        """
+        Recorre `iterable` midiendo el tiempo que tarda en producir cada elemento
+        (para generadores perezosos como el parser del chat).
+        """
+        if not self.activo:
+            yield from iterable
+            return
+        etapa = self._etapa(nombre)
+        it = iter(iterable)
+        while True:
+            inicio = time.perf_counter()
+            try:
+                elemento = next(it)
+            except StopIteration:
+                return
+            etapa.registrar(time.perf_counter() - inicio, 1, bytes_de(elemento) if bytes_de else 0)
+            yield elemento
+
+    # -------------------------------
+    # Resultados
+    # -------------------------------
+    def exportar(self) -> dict:
+        """
+        Estado serializable (para devolverlo desde un proceso worker).
+        """
+        return {nombre: (e.llamadas, e.elementos, e.segundos, e.bytes, e._vistas, e.muestras)
+                for nombre, e in self.etapas.items()}
+
+    def fusionar(self, datos: dict):
+        for nombre, (llamadas, elementos, segundos, nbytes, vistas, muestras) in datos.items():
+            otra = EstadisticaEtapa()
+            otra.llamadas, otra.elementos, otra.segundos = llamadas, elementos, segundos
+            otra.bytes, otra._vistas, otra.muestras = nbytes, vistas, list(muestras)
+            self._etapa(nombre).sumar(otra)
+
+    def resumen(self) -> str:
+        filas = [f"{'Etapa':<16} {'llamadas':>9} {'elementos':>10} {'total s':>9} {'MB':>8} "
+                 f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}"]
+        for nombre, e in sorted(self.etapas.items(), key=lambda x: -x[1].segundos):
+            d = e.a_dict()
+            filas.append(f"{nombre:<16} {d['llamadas']:>9} {d['elementos']:>10} {d['segundos']:>9.3f} "
+                         f"{d['bytes'] / 1e6:>8.2f} {d['p50_ms']:>8.3f} {d['p90_ms']:>8.3f} {d['p99_ms']:>8.3f}")
+        return "\n".join(filas)
+
+    def guardar_traza(self, ruta: str, extra: dict = None) -> str:
+        traza = {"pid": os.getpid(), "etapas": {n: e.a_dict() for n, e in self.etapas.items()}}
+        if extra:
+            traza.update(extra)
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(traza, f, ensure_ascii=False, indent=2)
+        return ruta
+
+
+# Instancia compartida por todos los módulos del proceso
+perfil = Perfil()
+
+
+def tamano_archivo(ruta, *_):
+    return os.path.getsize(ruta)
@@ -0,0 +1,210 @@
+# parser_chat.py
+# ===============================
+# Parser en streaming de exportaciones de WhatsApp
+# Recorre el chat una sola vez y produce registros tipados por mensaje
+# (fecha, hora, remitente, cuerpo, tipo de adjunto), uniendo los mensajes
+# que ocupan varias líneas.
+# ===============================
+
+import os
+import re
+from datetime import date
+from typing import NamedTuple, Optional
+
+# Meses en español indexados por número de mes (1-12)
+MESES = (
+    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
+)
+
+# Remitente cuyos mensajes no se cuentan como soportes
+REMITENTE_SOPORTE = "soporte donucol"
+
+# Regex para audios e imágenes
+regex_audio = re.compile(r"PTT-(\d{8})-WA\d+\.opus", re.IGNORECASE)
+regex_imagen = re.compile(r"IMG-(\d{8})-WA\d+\.(jpg|png|jpeg)", re.IGNORECASE)
+
+# Encabezado de mensaje: "dd/mm/aaaa, hh:mm[ a. m.] - Remitente: cuerpo"
+regex_encabezado = re.compile(
+    r"(\d{1,2}/\d{1,2}/\d{4}),[^\S\n]*"
+    r"(?:(\d{1,2}:\d{2}(?:[^\S\n]*[ap]\.?[^\S\n]*m\.?)?)[^\S\n]*-[^\S\n]*)?"
+    r"(.*)",
+    re.IGNORECASE | re.DOTALL
+)
+
+# Memo de fechas ya vistas: "08/01/2025" -> date(2025, 1, 8) (o None si no es válida)
+_memo_fechas = {}
+
+
+class Mensaje(NamedTuple):
+    fecha: date
+    hora: Optional[str]
+    remitente: Optional[str]
+    cuerpo: str
+    adjunto: Optional[str]          # "audio", "imagen" o None
+    nombre_adjunto: Optional[str]
+    offset: Optional[int] = None    # byte donde empieza el mensaje en el archivo
+
+    @property
+    def mes(self) -> str:
+        return MESES[self.fecha.month - 1]
+
+    @property
+    def es_de_soporte(self) -> bool:
+        return (self.remitente or "").lower() == REMITENTE_SOPORTE
+
+
+def parsear_fecha(texto: str):
+    """
+    Convierte "dd/mm/aaaa" en date usando un memo de fechas ya vistas.
+    Devuelve None si la fecha no es válida.
+    """
+    try:
+        return _memo_fechas[texto]
+    except KeyError:
+        pass
+    try:
+        dia, mes, anio = texto.split("/")
+        fecha = date(int(anio), int(mes), int(dia))
+    except ValueError:
+        fecha = None
+    _memo_fechas[texto] = fecha
+    return fecha
+
+
+def _crear_mensaje(fecha, hora, resto: str, offset=None) -> Mensaje:
+    remitente = None
+    cuerpo = resto
+    separador = resto.find(": ")
+    if separador != -1:
+        remitente = resto[:separador]
+        cuerpo = resto[separador + 2:]
+    elif resto.endswith(":"):
+        remitente = resto[:-1]
+        cuerpo = ""
+
+    adjunto = nombre_adjunto = None
+    m = regex_audio.search(cuerpo)
+    if m:
+        adjunto, nombre_adjunto = "audio", m.group(0)
+    else:
+        m = regex_imagen.search(cuerpo)
+        if m:
+            adjunto, nombre_adjunto = "imagen", m.group(0)
+    return Mensaje(fecha, hora, remitente, cuerpo, adjunto, nombre_adjunto, offset)
+
+
+def _parsear(pares):
+    """
+    Núcleo del parser: recibe pares (offset, línea) y produce Mensaje.
+    """
+    actual = None      # (fecha, hora, [partes del cuerpo], offset)
+    for offset, linea in pares:
+        linea = linea.rstrip("\r\n")
+        m = regex_encabezado.match(linea) if linea[:1].isdigit() else None
+        fecha = parsear_fecha(m.group(1)) if m else None
+        if fecha is None:
+            # Continuación del mensaje anterior (o texto antes del primero)
+            if actual is not None:
+                actual[2].append(linea)
+            continue
+
+        if actual is not None:
+            yield _crear_mensaje(actual[0], actual[1], "\n".join(actual[2]), actual[3])
+        actual = (fecha, m.group(2), [m.group(3)], offset)
+
+    if actual is not None:
+        yield _crear_mensaje(actual[0], actual[1], "\n".join(actual[2]), actual[3])
+
+
+def _lineas_con_offset(f, inicio: int):
+    pos = inicio
+    for linea in f:
+        texto = linea.decode("utf-8", errors="replace")
+        if pos == 0:
+            texto = texto.lstrip("\ufeff")
+        yield pos, texto
+        pos += len(linea)
+
+
+def iterar_mensajes(ruta_txt: str, desde_offset: int = 0):
+    """
+    Abre un chat exportado y produce sus mensajes en orden, sin cargarlo entero.
+    Cada Mensaje lleva el byte donde empieza, así se puede reanudar la
+    lectura más tarde con `desde_offset`.
+    """
+    with open(ruta_txt, "rb") as f:
+        if desde_offset:
+            f.seek(desde_offset)
+        yield from _parsear(_lineas_con_offset(f, desde_offset))
+
+
+# -------------------------------
+# Búsqueda por fecha (las exportaciones de WhatsApp son cronológicas)
+# -------------------------------
+BLOQUE_LINEAL = 64 * 1024
+
+
+def _fecha_encabezado(linea: bytes):
+    # La primera línea puede traer BOM (igual que en _lineas_con_offset)
+    if linea.startswith(b"\xef\xbb\xbf"):
+        linea = linea[3:]
+    if not linea[:1].isdigit():
+        return None
+    m = regex_encabezado.match(linea.decode("utf-8", errors="replace"))
+    return parsear_fecha(m.group(1)) if m else None
+
+
+def _primer_encabezado(f, pos: int):
+    """
+    Desde `pos` (descartando la línea a medias) devuelve (offset, fecha)
+    del primer encabezado de mensaje, o (None, None) si no hay más.
+    """
+    f.seek(pos)
+    if pos:
+        f.readline()
+    while True:
+        offset = f.tell()
+        linea = f.readline()
+        if not linea:
+            return None, None
+        fecha = _fecha_encabezado(linea)
+        if fecha is not None:
+            return offset, fecha
+
+
+def buscar_offset_fecha(ruta_txt: str, desde: date) -> int:
+    """
+    Byte del primer mensaje con fecha >= `desde` (o el tamaño del archivo si no hay).
+    Hace búsqueda binaria por offset hasta acotar un bloque pequeño y
+    termina con un recorrido lineal, así que lee O(log n) líneas sueltas.
+    """
+    tamano = os.path.getsize(ruta_txt)
+    with open(ruta_txt, "rb") as f:
+        lo, hi = 0, tamano
+        while hi - lo > BLOQUE_LINEAL:
+            mitad = (lo + hi) // 2
+            offset, fecha = _primer_encabezado(f, mitad)
+            if offset is None or fecha >= desde:
+                hi = mitad
+            else:
+                lo = mitad
+
+        offset, fecha = _primer_encabezado(f, lo)
+        while offset is not None and fecha < desde:
+            offset, fecha = _primer_encabezado(f, offset + 1)
+    return tamano if offset is None else offset
+
+
+def iterar_mensajes_rango(ruta_txt: str, desde: date = None, hasta: date = None):
+    """
+    Mensajes con fecha entre `desde` y `hasta` (incluidos, ambos opcionales).
+    Salta directamente al primer mensaje del rango y deja de leer al pasar `hasta`.
+    """
+    inicio = buscar_offset_fecha(ruta_txt, desde) if desde else 0
+    for msg in iterar_mensajes(ruta_txt, inicio):
+        if hasta is not None and msg.fecha > hasta:
+            break
+        if desde is not None and msg.fecha < desde:
+            continue
+        yield msg
@@ -0,0 +1,266 @@
+# pipeline_async.py
+# ===============================
+# Pipeline asíncrono (asyncio) para un chat:
+#   parseo -> decodificación (ffmpeg como subproceso async) + VAD -> reconocimiento
+#          -> OCR (imágenes) -> clasificación -> agregación en orden
+# Las etapas se comunican por colas acotadas (backpressure) y cada una
+# tiene su propia concurrencia, así el CPU (ffmpeg, OCR) y el reconocedor
+# trabajan a la vez. El consumidor recibe los mensajes en el orden de la
+# conversación, igual que el bucle en serie.
+# ===============================
+
+import os
+import time
+import asyncio
+import logging
+
+import speech_recognition as sr
+
+from transcribir import (FRECUENCIA, comando_pcm, cargar_audio, buscar_en_cache,
+                         registrar_transcripcion, reconocer_trozos)
+from vad import trozos_de_voz
+from reconocedores import obtener_reconocedor
+from procesar_imagenes import extraer_texto_imagen
+from indice_adjuntos import obtener_indice
+from instrumentacion import perfil
+
+log = logging.getLogger(__name__)
+
+# Tareas simultáneas por etapa (se pueden cambiar con --concurrencia)
+CONCURRENCIA = {
+    "decodificacion": 4,
+    "reconocimiento": 1,
+    "ocr": 2,
+    "clasificacion": 2,
+}
+
+# Elementos máximos esperando en cada cola entre etapas
+TAM_COLA = 64
+
+# Mensajes leídos y aún no entregados al consumidor (acota el reordenamiento)
+VENTANA = 2000
+
+_FIN = None
+
+
+def parsear_concurrencia(texto: str, base: dict = None) -> dict:
+    """
+    "decodificacion=8,reconocimiento=2" -> CONCURRENCIA (actualizada con `base`)
+    con esos valores cambiados.
+    """
+    concurrencia = dict(CONCURRENCIA, **(base or {}))
+    for parte in filter(None, (p.strip() for p in (texto or "").split(","))):
+        etapa, _, valor = parte.partition("=")
+        if etapa not in concurrencia or not valor.isdigit() or int(valor) < 1:
+            raise ValueError(f"Concurrencia no válida: '{parte}' (etapas: {', '.join(CONCURRENCIA)})")
+        concurrencia[etapa] = int(valor)
+    return concurrencia
+
+
+class _Elemento:
+    """
+    Un mensaje en tránsito. `adjunto` es el futuro con el texto del adjunto
+    (compartido si el mismo archivo aparece varias veces) y `resultado`
+    el futuro con (soporte, texto) que espera el consumidor.
+    """
+    __slots__ = ("msg", "encontrado", "adjunto", "resultado")
+
+    def __init__(self, msg, encontrado, adjunto, resultado):
+        self.msg = msg
+        self.encontrado = encontrado
+        self.adjunto = adjunto
+        self.resultado = resultado
+
+
+class PipelineChat:
+    def __init__(self, carpeta_adjuntos: str, clasificar, consumir, concurrencia: dict = None,
+                 tam_cola: int = TAM_COLA, ventana: int = VENTANA):
+        """
+        clasificar(msg, texto, encontrado) -> (soporte, texto_registro)
+        consumir(msg, soporte, texto) se llama en el orden de la conversación.
+        """
+        self.indice = obtener_indice(carpeta_adjuntos)
+        self.clasificar = clasificar
+        self.consumir = consumir
+        self.concurrencia = dict(CONCURRENCIA, **(concurrencia or {}))
+        self.tam_cola = tam_cola
+        self.ventana = ventana
+        self.reconocedor = obtener_reconocedor()
+
+    # -------------------------------
+    # Etapa 1: parseo (productor)
+    # -------------------------------
+    async def _parsear(self, mensajes):
+        loop = asyncio.get_running_loop()
+        en_curso = {}   # ruta del adjunto -> futuro con su texto
+        for n, msg in enumerate(mensajes):
+            await self._ventana.acquire()
+            encontrado, adjunto = True, None
+            if msg.adjunto is not None:
+                ruta = self.indice.ruta(msg.nombre_adjunto)
+                encontrado = ruta is not None
+                if encontrado:
+                    adjunto = en_curso.get(ruta)
+                    if adjunto is None:
+                        adjunto = en_curso[ruta] = loop.create_future()
+                        cola = self._cola_decodificar if msg.adjunto == "audio" else self._cola_ocr
+                        await cola.put((ruta, adjunto))
+            elemento = _Elemento(msg, encontrado, adjunto, loop.create_future())
+            self._cola_clasificar.put_nowait(elemento)
+            self._cola_orden.put_nowait(elemento)
+            if n % 256 == 0:
+                await asyncio.sleep(0)   # ceder el loop a las demás etapas
+
+        for _ in range(self.concurrencia["decodificacion"]):
+            await self._cola_decodificar.put(_FIN)
+        for _ in range(self.concurrencia["ocr"]):
+            await self._cola_ocr.put(_FIN)
+        for _ in range(self.concurrencia["clasificacion"]):
+            self._cola_clasificar.put_nowait(_FIN)
+        self._cola_orden.put_nowait(_FIN)
+
+    # -------------------------------
+    # Etapa 2: decodificación con ffmpeg (subproceso asíncrono)
+    # -------------------------------
+    async def _decodificar_pcm(self, ruta: str):
+        inicio = time.perf_counter()
+        try:
+            proceso = await asyncio.create_subprocess_exec(
+                *comando_pcm(ruta), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+            pcm, _ = await proceso.communicate()
+        except OSError as e:
+            log.error("No se pudo decodificar %s en memoria: %s", ruta, e)
+            return None
+        finally:
+            if perfil.activo:
+                perfil.registrar("decodificacion", time.perf_counter() - inicio, 1, os.path.getsize(ruta))
+        if proceso.returncode != 0 or not pcm:
+            log.error("No se pudo decodificar %s en memoria (ffmpeg terminó con %s)", ruta, proceso.returncode)
+            return None
+        return sr.AudioData(pcm, FRECUENCIA, 2)
+
+    async def _decodificador(self):
+        while (trabajo := await self._cola_decodificar.get()) is not _FIN:
+            ruta, futuro = trabajo
+            clave, texto = await asyncio.to_thread(buscar_en_cache, ruta, self.reconocedor)
+            if texto is not None:
+                futuro.set_result(texto)
+                continue
+            audio = None
+            if not ruta.lower().endswith(".wav"):
+                audio = await self._decodificar_pcm(ruta)
+            if audio is None:
+                # WAV, o respaldo con WAV temporal como en el modo en serie
+                audio = await asyncio.to_thread(cargar_audio, ruta, False)
+            if audio is None:
+                await asyncio.to_thread(registrar_transcripcion, ruta, clave, "")
+                futuro.set_result("")
+                continue
+            # Recorte de silencio y división en trozos (numpy, fuera del loop)
+            trozos = await asyncio.to_thread(trozos_de_voz, audio)
+            await self._cola_reconocer.put((ruta, clave, trozos, futuro))
+
+    # -------------------------------
+    # Etapa 3: reconocimiento (por lotes si el motor lo permite)
+    # -------------------------------
+    async def _reconocedor(self):
+        tam = max(1, self.reconocedor.tam_lote) if self.reconocedor.por_lotes else 1
+        terminado = False
+        while not terminado:
+            trabajo = await self._cola_reconocer.get()
+            if trabajo is _FIN:
+                break
+            lote = [trabajo]
+            # Se agrupa lo que ya está esperando, sin demorar el primer audio
+            while len(lote) < tam and not self._cola_reconocer.empty():
+                trabajo = self._cola_reconocer.get_nowait()
+                if trabajo is _FIN:
+                    terminado = True
+                    break
+                lote.append(trabajo)
+
+            inicio = time.perf_counter()
+            try:
+                textos = await asyncio.to_thread(reconocer_trozos, self.reconocedor, [t[2] for t in lote])
+            except Exception as e:
+                log.error("No se pudo transcribir el lote de %d audios: %s", len(lote), e)
+                textos = [""] * len(lote)
+            perfil.registrar("reconocimiento", time.perf_counter() - inicio, len(lote))
+
+            for (ruta, clave, _, futuro), texto in zip(lote, textos):
+                await asyncio.to_thread(registrar_transcripcion, ruta, clave, texto)
+                futuro.set_result(texto)
+
+    # -------------------------------
+    # Etapa 3b: OCR de imágenes
+    # -------------------------------
+    async def _ocr(self):
+        while (trabajo := await self._cola_ocr.get()) is not _FIN:
+            ruta, futuro = trabajo
+            futuro.set_result(await asyncio.to_thread(extraer_texto_imagen, ruta))
+
+    # -------------------------------
+    # Etapa 4: clasificación
+    # -------------------------------
+    async def _clasificador(self):
+        while (elemento := await self._cola_clasificar.get()) is not _FIN:
+            msg = elemento.msg
+            try:
+                if elemento.adjunto is not None:
+                    texto = await elemento.adjunto
+                    # Las imágenes sin texto pasan por el análisis visual (lee el archivo)
+                    resultado = await asyncio.to_thread(self.clasificar, msg, texto, True)
+                else:
+                    resultado = self.clasificar(msg, None, elemento.encontrado)
+                elemento.resultado.set_result(resultado)
+            except Exception as e:
+                elemento.resultado.set_exception(e)
+
+    # -------------------------------
+    # Etapa 5: agregación en el orden de la conversación
+    # -------------------------------
+    async def _ordenar(self):
+        while (elemento := await self._cola_orden.get()) is not _FIN:
+            soporte, texto = await elemento.resultado
+            self.consumir(elemento.msg, soporte, texto)
+            self._ventana.release()
+
+    async def _ejecutar(self, mensajes):
+        self._ventana = asyncio.Semaphore(self.ventana)
+        self._cola_decodificar = asyncio.Queue(self.tam_cola)
+        self._cola_reconocer = asyncio.Queue(self.tam_cola)
+        self._cola_ocr = asyncio.Queue(self.tam_cola)
+        # Acotadas por la ventana de mensajes en vuelo
+        self._cola_clasificar = asyncio.Queue()
+        self._cola_orden = asyncio.Queue()
+
+        decodificadores = [asyncio.create_task(self._decodificador())
+                           for _ in range(self.concurrencia["decodificacion"])]
+        reconocedores = [asyncio.create_task(self._reconocedor())
+                         for _ in range(self.concurrencia["reconocimiento"])]
+        etapas = [asyncio.create_task(self._ocr()) for _ in range(self.concurrencia["ocr"])]
+        etapas += [asyncio.create_task(self._clasificador())
+                   for _ in range(self.concurrencia["clasificacion"])]
+        etapas.append(asyncio.create_task(self._ordenar()))
+
+        async def cerrar_reconocimiento():
+            await asyncio.gather(*decodificadores)
+            for _ in reconocedores:
+                await self._cola_reconocer.put(_FIN)
+
+        tareas = [asyncio.create_task(self._parsear(mensajes)),
+                  asyncio.create_task(cerrar_reconocimiento()),
+                  *decodificadores, *reconocedores, *etapas]
+        # Si una etapa falla se cancelan las demás (si no, quedarían esperando en sus colas)
+        hechas, pendientes = await asyncio.wait(tareas, return_when=asyncio.FIRST_EXCEPTION)
+        for tarea in pendientes:
+            tarea.cancel()
+        for tarea in hechas:
+            tarea.result()
+
+    def ejecutar(self, mensajes):
+        """
+        Procesa todos los `mensajes` (iterable en orden) y vuelve cuando
+        el consumidor recibió el último.
+        """
+        asyncio.run(self._ejecutar(mensajes))
@@ -0,0 +1,92 @@
+# pipeline_audios.py
+# ===============================
+# Transcripción de audios en paralelo
+# Pre-escanea el chat buscando audios, los transcribe en un pool de
+# hilos o procesos (los más largos primero) y devuelve los resultados
+# en el orden de la conversación
+# ===============================
+
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from indice_adjuntos import obtener_indice
+
+
+def prescan_adjuntos(mensajes, carpeta_adjuntos: str) -> dict:
+    """
+    Recorre los mensajes (ver parser_chat.iterar_mensajes) una sola vez y
+    devuelve {"audio": [...], "imagen": [...]} con las rutas de los adjuntos
+    referenciados que existen en disco, sin repetidos y en orden de aparición.
+    La existencia se consulta en el índice de adjuntos de la carpeta.
+    """
+    indice = obtener_indice(carpeta_adjuntos)
+    rutas = {"audio": [], "imagen": []}
+    vistos = set()
+    for msg in mensajes:
+        if msg.adjunto is None or msg.nombre_adjunto in vistos:
+            continue
+        vistos.add(msg.nombre_adjunto)
+        ruta = indice.ruta(msg.nombre_adjunto)
+        if ruta is not None:
+            rutas[msg.adjunto].append(ruta)
+    return rutas
+
+
+def mas_largos_primero(rutas: list) -> list:
+    """
+    Las rutas ordenadas de la nota más larga a la más corta, con la duración
+    del índice de adjuntos (leída en paralelo la primera vez y persistida).
+    Así una nota larga no queda sola al final del pool. Las de duración
+    desconocida conservan su orden, detrás de las demás.
+    """
+    duraciones = {}
+    por_carpeta = {}
+    for ruta in rutas:
+        por_carpeta.setdefault(os.path.dirname(ruta), []).append(os.path.basename(ruta))
+    for carpeta, nombres in por_carpeta.items():
+        indice = obtener_indice(carpeta)
+        indice.precargar_metadatos(nombres)
+        for nombre in nombres:
+            entrada = indice.get(nombre) or {}
+            duraciones[os.path.join(carpeta, nombre)] = entrada.get("duracion") or 0
+    return sorted(rutas, key=lambda r: -duraciones[r])
+
+
+def transcribir_en_paralelo(rutas: list, workers: int = 4, procesos: bool = False) -> dict:
+    """
+    Transcribe (convertir_a_wav + reconocimiento) todas las rutas en un pool.
+    Devuelve un dict {ruta_audio: texto} cuyo orden de inserción coincide
+    con el orden de `rutas`, es decir, el de la conversación.
+    Con workers <= 1 se transcribe en serie, igual que antes.
+    """
+    if not rutas:
+        return {}
+    if workers > 1:
+        textos = _transcribir_pool(mas_largos_primero(rutas), workers, procesos)
+        return {ruta: textos[ruta] for ruta in rutas}
+    return _transcribir_pool(rutas, workers, procesos)
+
+
+def _transcribir_pool(rutas: list, workers: int, procesos: bool) -> dict:
+    # La pila de audio se carga solo si el chat tiene audios (el prescan no la necesita)
+    from transcribir import transcribir_audio, transcribir_lote, transcribir_en_proceso, cache
+    from reconocedores import obtener_reconocedor
+    if obtener_reconocedor().por_lotes:
+        # Motores locales: decodificación en paralelo + inferencia por lotes
+        return transcribir_lote(rutas, workers)
+    if workers <= 1:
+        return {ruta: transcribir_audio(ruta) for ruta in rutas}
+
+    if procesos:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Los contadores de la caché de cada proceso se suman aquí
+            textos = []
+            for texto, estadisticas in pool.map(transcribir_en_proceso, rutas):
+                cache.sumar(estadisticas)
+                textos.append(texto)
+        return dict(zip(rutas, textos))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # map conserva el orden de entrada aunque terminen desordenados
+        textos = list(pool.map(transcribir_audio, rutas))
+    return dict(zip(rutas, textos))
@@ -0,0 +1,169 @@
+# procesar_imagenes.py
+# ===============================
+# Etapa de imágenes: OCR local + análisis visual barato
+# - Miniatura previa para no pasar por OCR las fotos sin texto
+# - Resultados en caché por hash del contenido de la imagen
+# - Procesamiento por lotes en un pool de hilos
+# Necesita Pillow y pytesseract (y el ejecutable de Tesseract):
+#   pip install pillow pytesseract
+# ===============================
+
+import os
+import logging
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_transcripciones import CacheTranscripciones
+from instrumentacion import perfil, tamano_archivo
+
+try:
+    from PIL import Image
+except ImportError:  # sin Pillow no hay OCR ni análisis visual
+    Image = None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+CARPETA_CACHE_OCR = os.path.join("..", "transcripciones", "ocr")
+
+# Ajustes del OCR (forman parte de la clave de la caché)
+IDIOMA_OCR = "spa"
+LADO_MINIATURA = 96
+
+# Si el color dominante de la miniatura cubre menos que esto, es una foto
+# (las capturas de pantalla y documentos tienen un fondo uniforme)
+UMBRAL_FONDO = 0.20
+
+# Categoría para fotos sin texto. Por defecto ninguna: la imagen queda
+# "Imagen (pendiente clasificar)". Solo se asigna una categoría si se
+# configura explícitamente, p. ej. INFORME_SOPORTE_FOTO="Equipo Fisico".
+SOPORTE_FOTO = os.environ.get("INFORME_SOPORTE_FOTO") or None
+
+log = logging.getLogger(__name__)
+
+cache_ocr = CacheTranscripciones(CARPETA_CACHE_OCR, nombre="OCR")
+
+_avisado = False
+
+
+def _avisar_dependencias() -> bool:
+    global _avisado
+    if Image is not None and pytesseract is not None:
+        return True
+    if not _avisado:
+        log.warning("Falta Pillow o pytesseract: las imágenes quedan pendientes de clasificar")
+        _avisado = True
+    return False
+
+
+def _proporcion_fondo(imagen) -> float:
+    """
+    Fracción de píxeles de la miniatura que caen en el tono de gris más frecuente.
+    """
+    miniatura = imagen.convert("L")
+    miniatura.thumbnail((LADO_MINIATURA, LADO_MINIATURA))
+    histograma = miniatura.histogram()
+    # 16 niveles de gris para tolerar compresión JPEG y antialiasing
+    niveles = [sum(histograma[i:i + 16]) for i in range(0, 256, 16)]
+    total = sum(niveles)
+    return max(niveles) / total if total else 1.0
+
+
+@lru_cache(maxsize=4096)
+def _es_foto(ruta_imagen: str, mtime_ns: int, tamano: int) -> bool:
+    try:
+        with Image.open(ruta_imagen) as imagen:
+            imagen.draft("L", (LADO_MINIATURA * 2, LADO_MINIATURA * 2))  # JPEG: decodifica reducido
+            return _proporcion_fondo(imagen) < UMBRAL_FONDO
+    except Exception as e:
+        log.error("No se pudo abrir %s: %s", ruta_imagen, e)
+        return False
+
+
+def es_foto_sin_texto(ruta_imagen: str) -> bool:
+    """
+    Revisión rápida sobre una miniatura: True si la imagen es claramente
+    una foto (sin fondo uniforme) y no vale la pena pasarla por OCR.
+    El veredicto se recuerda por (ruta, mtime, tamaño): el OCR y el
+    análisis visual de la misma imagen decodifican la miniatura una sola vez.
+    """
+    if Image is None:
+        return False
+    try:
+        st = os.stat(ruta_imagen)
+    except OSError as e:
+        log.error("No se pudo abrir %s: %s", ruta_imagen, e)
+        return False
+    return _es_foto(ruta_imagen, st.st_mtime_ns, st.st_size)
+
+
+@perfil.medir("ocr", tamano_archivo)
+def _ocr(ruta_imagen: str) -> str:
+    if es_foto_sin_texto(ruta_imagen):
+        return ""
+    try:
+        with Image.open(ruta_imagen) as imagen:
+            return pytesseract.image_to_string(imagen.convert("L"), lang=IDIOMA_OCR).strip()
+    except Exception as e:
+        log.error("OCR falló en %s: %s", ruta_imagen, e)
+        return None
+
+
+def extraer_texto_imagen(ruta_imagen: str) -> str:
+    """
+    Devuelve el texto de la imagen (cadena vacía si no tiene texto).
+    Usa la caché por hash del contenido antes de lanzar el OCR.
+    """
+    if not _avisar_dependencias():
+        return ""
+    try:
+        clave = cache_ocr.clave(ruta_imagen, f"tesseract|{IDIOMA_OCR}|{UMBRAL_FONDO}")
+    except OSError as e:
+        log.error("No se pudo leer %s: %s", ruta_imagen, e)
+        return ""
+    texto = cache_ocr.obtener(clave)
+    if texto is not None:
+        return texto
+
+    texto = _ocr(ruta_imagen)
+    if texto is None:  # error: no se guarda, se reintenta en la próxima ejecución
+        return ""
+    cache_ocr.guardar(clave, texto)
+    return texto
+
+
+def analizar_visualmente(ruta_imagen: str):
+    """
+    Clasificación de respaldo cuando la imagen no tiene texto: las fotos
+    devuelven SOPORTE_FOTO si está configurado; si no (o no es foto), None.
+    """
+    if SOPORTE_FOTO is None:
+        return None
+    if es_foto_sin_texto(ruta_imagen):
+        return SOPORTE_FOTO
+    return None
+
+
+def procesar_imagenes(rutas: list, workers: int = 4, tam_lote: int = 32) -> dict:
+    """
+    Ejecuta el OCR de todas las rutas por lotes en un pool de hilos
+    (Tesseract corre como proceso externo, así que los hilos no compiten por el GIL).
+    Devuelve {ruta_imagen: texto} en el mismo orden que `rutas`.
+    """
+    if not rutas:
+        return {}
+    if workers <= 1:
+        return {ruta: extraer_texto_imagen(ruta) for ruta in rutas}
+
+    textos = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for inicio in range(0, len(rutas), tam_lote):
+            lote = rutas[inicio:inicio + tam_lote]
+            textos.update(zip(lote, pool.map(extraer_texto_imagen, lote)))
+    return textos
+
+
+def resumen_cache_ocr() -> str:
+    return cache_ocr.resumen()
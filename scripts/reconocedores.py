@@ -0,0 +1,189 @@
+# reconocedores.py
+# ===============================
+# Motores de reconocimiento de voz intercambiables
+# - "google":  SpeechRecognition + API web de Google (uno por uno, por red)
+# - "whisper": modelo local en CPU con faster-whisper (sin red, por lotes)
+# - "stub":    respuestas deterministas para pruebas y benchmarks
+# Se elige con la variable de entorno INFORME_RECONOCEDOR (por defecto "google").
+# Para el motor local:  pip install faster-whisper
+# ===============================
+
+import os
+import logging
+import hashlib
+import threading
+
+import speech_recognition as sr
+
+FRECUENCIA = 16000
+
+# Ventana fija del codificador de Whisper: los audios de hasta esta
+# duración se rellenan a la ventana y se reconocen juntos en un solo lote
+VENTANA_WHISPER_S = 30
+
+log = logging.getLogger(__name__)
+
+
+class Reconocedor:
+    """
+    Interfaz común: reciben sr.AudioData y devuelven texto.
+    `ajustes` identifica motor + parámetros (forma parte de la clave de caché).
+    """
+    nombre = "base"
+    por_lotes = False
+    tam_lote = 1
+
+    @property
+    def ajustes(self) -> str:
+        return self.nombre
+
+    def transcribir(self, audio) -> str:
+        return self.transcribir_lote([audio])[0]
+
+    def transcribir_lote(self, audios: list) -> list:
+        raise NotImplementedError
+
+
+class ReconocedorGoogle(Reconocedor):
+    nombre = "google"
+
+    def __init__(self, idioma: str = "es-ES"):
+        self.idioma = idioma
+        self._r = sr.Recognizer()
+
+    @property
+    def ajustes(self) -> str:
+        return f"google|{self.idioma}"
+
+    def transcribir(self, audio) -> str:
+        return self._r.recognize_google(audio, language=self.idioma)
+
+    def transcribir_lote(self, audios: list) -> list:
+        return [self.transcribir(a) for a in audios]
+
+
+class ReconocedorWhisper(Reconocedor):
+    """
+    Modelo local en CPU. El modelo se carga una sola vez por proceso
+    (la primera vez que se usa) y se reutiliza para todos los audios.
+    Los audios de hasta VENTANA_WHISPER_S (los trozos del VAD) se reconocen
+    de a `tam_lote` en una sola pasada del codificador y del decodificador;
+    los más largos, uno por uno con BatchedInferencePipeline.
+    """
+    nombre = "whisper"
+    por_lotes = True
+
+    _modelos = {}   # (modelo, cómputo) -> instancia cargada en este proceso
+    # Hilos de decodificación, pools y el pipeline asíncrono pueden pedir el modelo a la vez
+    _carga = threading.Lock()
+
+    def __init__(self, modelo: str = "small", idioma: str = "es", tam_lote: int = 8,
+                 computo: str = "int8"):
+        self.modelo = modelo
+        self.idioma = idioma
+        self.tam_lote = tam_lote
+        self.computo = computo
+
+    @property
+    def ajustes(self) -> str:
+        return f"whisper|{self.modelo}|{self.idioma}|{self.computo}"
+
+    def _modelo(self):
+        clave = (self.modelo, self.computo)
+        with self._carga:
+            if clave not in self._modelos:
+                from faster_whisper import WhisperModel
+                log.debug("Cargando modelo whisper '%s' (%s, CPU)", self.modelo, self.computo)
+                self._modelos[clave] = WhisperModel(self.modelo, device="cpu", compute_type=self.computo)
+            return self._modelos[clave]
+
+    @staticmethod
+    def _a_float32(audio):
+        import numpy as np
+        pcm = audio.get_raw_data(convert_rate=FRECUENCIA, convert_width=2)
+        return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+    def _lote_corto(self, modelo, muestras: list) -> list:
+        """
+        Reconoce juntos varios audios de hasta VENTANA_WHISPER_S: sus espectrogramas
+        se rellenan a la ventana fija, se apilan y pasan por el codificador y
+        por generate() una sola vez para todo el lote.
+        """
+        import numpy as np
+        from faster_whisper.audio import pad_or_trim
+        from faster_whisper.tokenizer import Tokenizer
+
+        extractor = modelo.feature_extractor
+        espectros = np.stack([pad_or_trim(extractor(m)) for m in muestras]).astype(np.float32)
+        tokenizador = Tokenizer(modelo.hf_tokenizer, modelo.model.is_multilingual,
+                                task="transcribe", language=self.idioma)
+        prompt = list(tokenizador.sot_sequence) + [tokenizador.no_timestamps]
+        resultados = modelo.model.generate(modelo.encode(espectros), [prompt] * len(muestras),
+                                           beam_size=5, max_length=modelo.max_length)
+        return [tokenizador.decode(r.sequences_ids[0]).strip() for r in resultados]
+
+    def transcribir_lote(self, audios: list) -> list:
+        modelo = self._modelo()
+        muestras = [self._a_float32(a) for a in audios]
+        textos = [""] * len(muestras)
+
+        cortos = [i for i, m in enumerate(muestras) if len(m) <= VENTANA_WHISPER_S * FRECUENCIA]
+        tam = max(1, self.tam_lote)
+        for inicio in range(0, len(cortos), tam):
+            indices = cortos[inicio:inicio + tam]
+            for i, texto in zip(indices, self._lote_corto(modelo, [muestras[i] for i in indices])):
+                textos[i] = texto
+
+        largos = sorted(set(range(len(muestras))) - set(cortos))
+        if largos:
+            # Sin VAD: el pipeline agrupa los segmentos de cada audio en lotes de tam_lote
+            from faster_whisper import BatchedInferencePipeline
+            pipeline = BatchedInferencePipeline(model=modelo)
+            for i in largos:
+                segmentos, _ = pipeline.transcribe(muestras[i], language=self.idioma, batch_size=tam)
+                textos[i] = " ".join(s.text.strip() for s in segmentos).strip()
+        return textos
+
+
+class ReconocedorStub(Reconocedor):
+    """
+    Devuelve siempre `texto`, o si no se indica, un texto derivado del hash
+    del audio (mismo audio -> mismo texto). No usa red ni modelos.
+    """
+    nombre = "stub"
+    por_lotes = True
+    tam_lote = 64
+
+    def __init__(self, texto: str = None):
+        self.texto = texto
+
+    def transcribir_lote(self, audios: list) -> list:
+        if self.texto is not None:
+            return [self.texto for _ in audios]
+        return ["stub " + hashlib.sha1(a.get_raw_data()).hexdigest()[:8] for a in audios]
+
+
+MOTORES = {
+    "google": ReconocedorGoogle,
+    "whisper": ReconocedorWhisper,
+    "stub": ReconocedorStub,
+}
+
+_instancias = {}
+
+
+def obtener_reconocedor(nombre: str = None) -> Reconocedor:
+    """
+    Devuelve (y reutiliza) el reconocedor configurado.
+    Orden: argumento -> INFORME_RECONOCEDOR -> "google".
+    """
+    nombre = (nombre or os.environ.get("INFORME_RECONOCEDOR") or "google").lower()
+    if nombre not in MOTORES:
+        raise ValueError(f"Reconocedor desconocido: {nombre} (opciones: {', '.join(MOTORES)})")
+    if nombre not in _instancias:
+        if nombre == "whisper":
+            _instancias[nombre] = ReconocedorWhisper(
+                modelo=os.environ.get("INFORME_MODELO_WHISPER", "small"))
+        else:
+            _instancias[nombre] = MOTORES[nombre]()
+    return _instancias[nombre]
@@ -1,19 +1,38 @@
 # transcribir.py
 # ===============================
-# Convierte audios en texto usando SpeechRecognition
-# Convierte a WAV si es necesario y guarda transcripciones
+# Convierte audios en texto con el reconocedor configurado (ver reconocedores.py)
+# Decodifica en memoria (o a WAV temporal), recorta el silencio y divide
+# las notas largas (ver vad.py), y guarda transcripciones
 # ===============================
 
 import os
+import logging
 import subprocess
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
 import speech_recognition as sr
 
+from cache_transcripciones import CacheTranscripciones
+from reconocedores import obtener_reconocedor
+from instrumentacion import perfil, tamano_archivo
+from vad import trozos_de_voz, ajustes_vad
+
+log = logging.getLogger(__name__)
+
 CARPETA_TRANSCRIPCIONES = "../transcripciones"
 
-# Asegurar que la carpeta exista
-os.makedirs(CARPETA_TRANSCRIPCIONES, exist_ok=True)
+# Formato al que se decodifica todo audio antes de reconocerlo
+FRECUENCIA = 16000
+
+# Trozos de una nota que se reconocen a la vez con los motores de a uno (red)
+TROZOS_EN_PARALELO = 4
+
+# Caché compartida por todo el proceso (crea su carpeta al primer uso)
+cache = CacheTranscripciones()
 
 
+@perfil.medir("convertir_a_wav", tamano_archivo)
 def convertir_a_wav(ruta_audio: str) -> str:
     """
     Convierte un archivo de audio a WAV (16kHz, mono).
@@ -22,53 +41,227 @@ def convertir_a_wav(ruta_audio: str) -> str:
     ruta_wav = os.path.splitext(ruta_audio)[0] + "_temp.wav"
     try:
         subprocess.run(
-            ["ffmpeg", "-y", "-i", ruta_audio, "-ar", "16000", "-ac", "1", ruta_wav],
+            ["ffmpeg", "-y", "-i", ruta_audio, "-ar", str(FRECUENCIA), "-ac", "1", ruta_wav],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             check=True
         )
         return ruta_wav
     except Exception as e:
-        print(f"[ERROR] No se pudo convertir {ruta_audio} a WAV: {e}")
+        log.error("No se pudo convertir %s a WAV: %s", ruta_audio, e)
         return None
 
 
-def transcribir_audio(ruta_audio: str) -> str:
+def comando_pcm(ruta_audio: str) -> list:
     """
-    Transcribe un archivo de audio a texto (español).
-    Si el formato no es compatible, convierte a WAV.
-    Además guarda la transcripción en un archivo .txt
-    dentro de la carpeta de transcripciones.
+    Comando ffmpeg que escribe el audio en la salida estándar como PCM
+    16 kHz mono de 16 bits (s16le).
     """
-    r = sr.Recognizer()
-    texto = ""
+    return ["ffmpeg", "-nostdin", "-i", ruta_audio, "-f", "s16le", "-acodec", "pcm_s16le",
+            "-ar", str(FRECUENCIA), "-ac", "1", "-"]
 
-    # Si no es WAV → convertir
-    ruta_usable = ruta_audio
-    if not ruta_audio.lower().endswith(".wav"):
-        ruta_usable = convertir_a_wav(ruta_audio)
-        if ruta_usable is None:
-            return ""
 
+@perfil.medir("decodificacion", tamano_archivo)
+def decodificar_pcm(ruta_audio: str):
+    """
+    Decodifica el audio con ffmpeg directamente a PCM 16 kHz mono de 16 bits
+    leyendo la salida estándar, sin escribir ningún WAV temporal.
+    Devuelve un sr.AudioData o None si ffmpeg falla.
+    """
     try:
-        with sr.AudioFile(ruta_usable) as source:
-            audio = r.record(source)
-        texto = r.recognize_google(audio, language="es-ES")
+        proceso = subprocess.run(
+            comando_pcm(ruta_audio),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True
+        )
     except Exception as e:
-        print(f"[ERROR] No se pudo transcribir {ruta_audio}: {e}")
-        texto = ""
+        log.error("No se pudo decodificar %s en memoria: %s", ruta_audio, e)
+        return None
+    if not proceso.stdout:
+        return None
+    return sr.AudioData(proceso.stdout, FRECUENCIA, 2)
 
+
+def cargar_audio(ruta_audio: str, en_memoria: bool = True):
+    """
+    Devuelve el audio listo para el reconocedor (sr.AudioData).
+    Los WAV se leen tal cual; el resto se decodifica en memoria y, si eso
+    falla, se usa el camino clásico con un WAV temporal que luego se borra.
+    """
+    r = sr.Recognizer()
+    if ruta_audio.lower().endswith(".wav"):
+        with sr.AudioFile(ruta_audio) as source:
+            return r.record(source)
+
+    if en_memoria:
+        audio = decodificar_pcm(ruta_audio)
+        if audio is not None:
+            return audio
+
+    ruta_wav = convertir_a_wav(ruta_audio)
+    if ruta_wav is None:
+        return None
+    try:
+        with sr.AudioFile(ruta_wav) as source:
+            return r.record(source)
+    finally:
+        if os.path.exists(ruta_wav):
+            os.remove(ruta_wav)
+
+
+def _guardar_transcripcion(ruta_audio: str, texto: str):
     # Guardar transcripción en carpeta
     nombre = os.path.splitext(os.path.basename(ruta_audio))[0] + ".txt"
     ruta_salida = os.path.join(CARPETA_TRANSCRIPCIONES, nombre)
     try:
+        # La carpeta se crea con la primera transcripción, no al importar
+        os.makedirs(CARPETA_TRANSCRIPCIONES, exist_ok=True)
         with open(ruta_salida, "w", encoding="utf-8") as f:
             f.write(texto)
     except Exception as e:
-        print(f"[ERROR] No se pudo guardar la transcripción de {ruta_audio}: {e}")
+        log.error("No se pudo guardar la transcripción de %s: %s", ruta_audio, e)
+
+
+def buscar_en_cache(ruta_audio: str, reconocedor):
+    """
+    Devuelve (clave, texto en caché o None). La clave es None si no se pudo leer el audio.
+    La clave incluye los ajustes del reconocedor y los del VAD.
+    """
+    try:
+        clave = cache.clave(ruta_audio, f"{reconocedor.ajustes}|{ajustes_vad()}")
+    except OSError as e:
+        log.error("No se pudo leer la caché para %s: %s", ruta_audio, e)
+        return None, None
+    return clave, cache.obtener(clave)
+
+
+def registrar_transcripcion(ruta_audio: str, clave, texto: str):
+    """
+    Guarda el .txt de la transcripción y la cachea si tiene texto
+    (los fallos no se cachean, así se reintentan en la próxima ejecución).
+    """
+    _guardar_transcripcion(ruta_audio, texto)
+    if clave and texto:
+        cache.guardar(clave, texto)
+
+
+def _reconocer_trozo(reconocedor, trozo) -> str:
+    try:
+        return reconocedor.transcribir(trozo)
+    except sr.UnknownValueError:
+        # Un trozo sin habla entendible no invalida el resto de la nota
+        return ""
+
+
+def reconocer_trozos(reconocedor, trozos_por_audio: list) -> list:
+    """
+    Recibe, por cada audio, la lista de sus trozos con voz y devuelve un
+    texto por audio con los trozos unidos en orden. Los motores por lotes
+    reciben todos los trozos juntos; los demás los reconocen en hilos.
+    """
+    trozos = [t for lista in trozos_por_audio for t in lista]
+    if not trozos:
+        textos = []
+    elif reconocedor.por_lotes:
+        textos = reconocedor.transcribir_lote(trozos)
+    elif len(trozos) == 1:
+        textos = [_reconocer_trozo(reconocedor, trozos[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(TROZOS_EN_PARALELO, len(trozos))) as pool:
+            textos = list(pool.map(partial(_reconocer_trozo, reconocedor), trozos))
 
-    # Eliminar temporal WAV si se generó
-    if ruta_usable != ruta_audio and os.path.exists(ruta_usable):
-        os.remove(ruta_usable)
+    unidos, i = [], 0
+    for lista in trozos_por_audio:
+        unidos.append(" ".join(t.strip() for t in textos[i:i + len(lista)] if t and t.strip()))
+        i += len(lista)
+    return unidos
 
+
+def transcribir_audio(ruta_audio: str, usar_cache: bool = True, en_memoria: bool = True) -> str:
+    """
+    Transcribe un archivo de audio a texto (español).
+    Si el formato no es WAV, lo decodifica en memoria con ffmpeg
+    (o a un WAV temporal si la decodificación en memoria falla).
+    Además guarda la transcripción en un archivo .txt
+    dentro de la carpeta de transcripciones.
+    Si el mismo audio ya se transcribió con los mismos ajustes,
+    devuelve el texto de la caché sin convertir ni reconocer.
+    """
+    # Motor elegido con INFORME_RECONOCEDOR; sus ajustes (y los del VAD) van en la clave de la caché
+    reconocedor = obtener_reconocedor()
+    clave = None
+    if usar_cache:
+        clave, texto = buscar_en_cache(ruta_audio, reconocedor)
+        if texto is not None:
+            return texto
+
+    try:
+        audio = cargar_audio(ruta_audio, en_memoria)
+        if audio is None:
+            return ""
+        trozos = trozos_de_voz(audio)
+        with perfil.etapa("reconocimiento", elementos=len(trozos)):
+            texto = reconocer_trozos(reconocedor, [trozos])[0]
+    except Exception as e:
+        log.error("No se pudo transcribir %s: %s", ruta_audio, e)
+        texto = ""
+
+    registrar_transcripcion(ruta_audio, clave, texto)
     return texto
+
+
+def transcribir_en_proceso(ruta_audio: str) -> tuple:
+    """
+    transcribir_audio para pools de procesos: devuelve (texto, aciertos/fallos/
+    desalojos de la caché en esta llamada) para sumarlos con cache.sumar en el padre.
+    """
+    antes = cache.estadisticas()
+    texto = transcribir_audio(ruta_audio)
+    return texto, tuple(despues - previo for previo, despues in zip(antes, cache.estadisticas()))
+
+
+def transcribir_lote(rutas: list, workers: int = 4, usar_cache: bool = True) -> dict:
+    """
+    Transcribe varios audios aprovechando los motores que trabajan por lotes:
+    consulta la caché, decodifica los que faltan en un pool de hilos y
+    los pasa al reconocedor en lotes de `tam_lote`.
+    Devuelve {ruta_audio: texto} en el mismo orden que `rutas`.
+    """
+    reconocedor = obtener_reconocedor()
+    textos = dict.fromkeys(rutas, "")
+    claves = {}
+    pendientes = []
+    for ruta in rutas:
+        clave, texto = buscar_en_cache(ruta, reconocedor) if usar_cache else (None, None)
+        if texto is not None:
+            textos[ruta] = texto
+        else:
+            claves[ruta] = clave
+            pendientes.append(ruta)
+
+    tam = max(1, reconocedor.tam_lote)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for inicio in range(0, len(pendientes), tam):
+            lote = pendientes[inicio:inicio + tam]
+            audios = list(pool.map(cargar_audio, lote))
+            validos = [(r, trozos_de_voz(a)) for r, a in zip(lote, audios) if a is not None]
+            try:
+                with perfil.etapa("reconocimiento", elementos=len(validos)):
+                    resultados = reconocer_trozos(reconocedor, [t for _, t in validos])
+            except Exception as e:
+                log.error("No se pudo transcribir el lote de %d audios: %s", len(validos), e)
+                resultados = [""] * len(validos)
+            for (ruta, _), texto in zip(validos, resultados):
+                textos[ruta] = texto
+
+    for ruta in pendientes:
+        registrar_transcripcion(ruta, claves.get(ruta), textos[ruta])
+    return textos
+
+
+def resumen_cache() -> str:
+    """
+    Devuelve el resumen de aciertos/fallos de la caché de transcripciones.
+    """
+    return cache.resumen()
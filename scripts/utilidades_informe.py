@@ -3,9 +3,10 @@
 # Funciones de apoyo (regex, extracción de fechas, indexación de audios, etc.)
 # ===============================
 
-import os
 import re
-from datetime import datetime
+
+from parser_chat import parsear_fecha, iterar_mensajes
+from indice_adjuntos import obtener_indice
 
 # Regex para fecha en líneas del chat
 regex_fecha = re.compile(r"(\d{1,2}/\d{1,2}/\d{4})")
@@ -18,22 +19,23 @@ def extraer_fecha_linea(linea: str):
     m = regex_fecha.search(linea)
     if not m:
         return None
-    try:
-        return datetime.strptime(m.group(1), "%d/%m/%Y").date()
-    except:
-        return None
+    return parsear_fecha(m.group(1))
 
 def build_audio_index(ruta_txt, carpeta_audios, remitente_excluido="Soporte"):
     """
     Construye un índice { (fecha, hora, remitente) : ruta_audio } 
-    a partir de los audios en la carpeta.
+    a partir de los audios del chat que existen en la carpeta.
+    Los mensajes cuyo remitente empieza por `remitente_excluido` no se indexan.
     """
+    adjuntos = obtener_indice(carpeta_audios)
+    excluido = (remitente_excluido or "").lower()
     index = {}
-    for archivo in os.listdir(carpeta_audios):
-        if archivo.lower().endswith((".opus", ".ogg", ".mp3", ".m4a", ".wav")):
-            # Formato esperado de WhatsApp: PTT-20250904-WA0008.opus
-            # Se podría mejorar si definimos un parser de nombres
-            ruta_audio = os.path.join(carpeta_audios, archivo)
-            # De momento el indexado se llena manualmente desde crear_informe
-            # (aquí se podría mejorar con metadatos si se usa datos_audios.py)
+    for msg in iterar_mensajes(ruta_txt):
+        if msg.adjunto != "audio":
+            continue
+        if excluido and (msg.remitente or "").lower().startswith(excluido):
+            continue
+        ruta_audio = adjuntos.ruta(msg.nombre_adjunto)
+        if ruta_audio is not None:
+            index[(msg.fecha, msg.hora, msg.remitente)] = ruta_audio
     return index
@@ -0,0 +1,143 @@
+# vad.py
+# ===============================
+# Detección de voz por energía sobre PCM 16 kHz mono de 16 bits
+# - Recorta el silencio del principio y del final de cada nota de voz
+# - Divide las notas largas en trozos de como máximo MAX_TROZO_S segundos,
+#   cortando en la ventana más silenciosa, para reconocerlos en paralelo
+# Sin dependencias externas aparte de numpy. Se desactiva con INFORME_VAD=0.
+# ===============================
+
+import os
+
+import numpy as np
+import speech_recognition as sr
+
+from instrumentacion import perfil
+
+FRECUENCIA = 16000
+
+# Ventana de análisis
+VENTANA_MS = 30
+
+# Una ventana tiene voz si su energía RMS supera
+# max(UMBRAL_MINIMO, RELACION_RUIDO × ruido de fondo estimado)
+UMBRAL_MINIMO = 300
+RELACION_RUIDO = 3.0
+
+# El ruido de fondo se estima con las ventanas más silenciosas (percentil);
+# si aun esas superan RUIDO_MAXIMO la nota no tiene silencio real (habla
+# continua, local ruidoso) y no se recorta; solo se divide si es larga
+PERCENTIL_RUIDO = 10
+RUIDO_MAXIMO = 600
+
+# Silencio que se deja antes y después de la voz
+MARGEN_MS = 250
+
+# Largo máximo de cada trozo enviado al reconocedor (la API web de Google
+# devuelve vacío con audios de más de ~60 s) y desde dónde se busca el corte
+MAX_TROZO_S = 25
+MIN_TROZO_S = 10
+
+
+def energias(pcm: np.ndarray, muestras_ventana: int) -> np.ndarray:
+    """
+    Energía RMS de cada ventana completa del audio.
+    """
+    n = len(pcm) // muestras_ventana
+    if n == 0:
+        return np.zeros(0)
+    ventanas = pcm[:n * muestras_ventana].astype(np.float64).reshape(n, muestras_ventana)
+    return np.sqrt((ventanas ** 2).mean(axis=1))
+
+
+def umbral_voz(rms: np.ndarray):
+    """
+    Energía por encima de la cual una ventana tiene voz, o None si la nota
+    no tiene silencio real (ni sus ventanas más tranquilas bajan de RUIDO_MAXIMO).
+    """
+    if len(rms) == 0:
+        return None
+    ruido = np.percentile(rms, PERCENTIL_RUIDO)
+    if ruido > RUIDO_MAXIMO:
+        return None
+    return max(UMBRAL_MINIMO, RELACION_RUIDO * ruido)
+
+
+def _cortes(rms: np.ndarray, inicio: int, fin: int, max_ventanas: int, min_ventanas: int) -> list:
+    """
+    Límites (en ventanas) de trozos de a lo sumo `max_ventanas` entre inicio y fin.
+    Cada corte va en la ventana de menor energía de su zona de búsqueda
+    (entre min_ventanas y max_ventanas desde el corte anterior): un silencio
+    si la zona lo tiene y, si no (habla continua, pausas cortas, ruido de
+    fondo), la pausa más marcada, aunque supere el umbral de voz.
+    """
+    limites = [inicio]
+    while fin - limites[-1] > max_ventanas:
+        desde = limites[-1] + min_ventanas
+        hasta = limites[-1] + max_ventanas
+        limites.append(desde + int(np.argmin(rms[desde:hasta])))
+    limites.append(fin)
+    return limites
+
+
+@perfil.medir("vad")
+def preparar_audio(audio: sr.AudioData) -> list:
+    """
+    Devuelve la lista de trozos (sr.AudioData 16 kHz) con voz del audio,
+    ninguno de más de MAX_TROZO_S segundos. Solo recorta el principio y el
+    final donde hay silencio real; sin él la nota se divide entera.
+    Lista vacía solo si toda la nota está por debajo de UMBRAL_MINIMO
+    (no hay nada que reconocer).
+    """
+    crudo = audio.get_raw_data(convert_rate=FRECUENCIA, convert_width=2)
+    pcm = np.frombuffer(crudo, dtype=np.int16)
+    muestras_ventana = FRECUENCIA * VENTANA_MS // 1000
+    rms = energias(pcm, muestras_ventana)
+    if len(rms) == 0:
+        return [audio] if len(pcm) else []
+
+    # Sin recorte: toda la nota (habla continua, o tan baja que el umbral no
+    # la distingue del fondo; en la duda, se reconoce entera)
+    inicio, fin = 0, len(rms)
+    umbral = umbral_voz(rms)
+    if umbral is not None:
+        indices = np.flatnonzero(rms > umbral)
+        if len(indices):
+            margen = MARGEN_MS // VENTANA_MS
+            inicio = max(0, indices[0] - margen)
+            fin = min(len(rms), indices[-1] + 1 + margen)
+        elif rms.max() <= UMBRAL_MINIMO:
+            return []
+    if (inicio, fin) == (0, len(rms)) and fin <= MAX_TROZO_S * 1000 // VENTANA_MS:
+        return [audio]
+    limites = _cortes(rms, inicio, fin, MAX_TROZO_S * 1000 // VENTANA_MS,
+                      MIN_TROZO_S * 1000 // VENTANA_MS)
+
+    trozos = []
+    for a, b in zip(limites, limites[1:]):
+        # El último trozo conserva la cola que no llena una ventana
+        hasta = b * muestras_ventana if b < len(rms) else len(pcm)
+        trozos.append(sr.AudioData(pcm[a * muestras_ventana:hasta].tobytes(), FRECUENCIA, 2))
+    return trozos
+
+
+def vad_activo() -> bool:
+    return os.environ.get("INFORME_VAD", "1") != "0"
+
+
+def ajustes_vad() -> str:
+    """
+    Identifica el preprocesado aplicado (forma parte de la clave de la caché
+    de transcripciones: recortar y dividir cambia el texto reconocido).
+    """
+    if not vad_activo():
+        return "vad=no"
+    return (f"vad|{VENTANA_MS}|{UMBRAL_MINIMO}|{RELACION_RUIDO}|{PERCENTIL_RUIDO}|{RUIDO_MAXIMO}"
+            f"|{MARGEN_MS}|{MAX_TROZO_S}|{MIN_TROZO_S}")
+
+
+def trozos_de_voz(audio: sr.AudioData) -> list:
+    """
+    Trozos a reconocer: los de preparar_audio, o el audio entero si el VAD está desactivado.
+    """
+    return preparar_audio(audio) if vad_activo() else [audio]
@@ -0,0 +1,173 @@
+# vigilar_carpeta.py
+# ===============================
+# Vigilancia de la carpeta de chats para el modo --vigilar
+# - Linux: inotify (por ctypes, sin dependencias), despierta al instante
+# - Resto (o si inotify falla): sondeo periódico de mtime y tamaño
+# Las ráfagas de cambios (copiar una exportación con cientos de audios)
+# se agrupan: se entrega un solo lote cuando la carpeta lleva ESPERA
+# segundos sin cambios (o tras ESPERA_MAXIMA si no para de cambiar).
+# ===============================
+
+import os
+import time
+import select
+import struct
+import logging
+
+log = logging.getLogger(__name__)
+
+EXTENSIONES = (".txt", ".opus", ".jpg", ".jpeg", ".png")
+
+# Segundos de calma antes de procesar un lote de cambios
+ESPERA = 2.0
+ESPERA_MAXIMA = 60.0
+
+# Segundos entre recorridos en modo sondeo
+INTERVALO_SONDEO = 1.0
+
+# Eventos de inotify (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+_CABECERA = struct.Struct("iIII")   # wd, mask, cookie, len
+
+
+class _Inotify:
+    """
+    Descriptor inotify sobre una carpeta. leer(t) espera hasta t segundos y
+    devuelve los nombres de archivo que cambiaron (None si se desbordó la cola).
+    """
+
+    def __init__(self, carpeta: str):
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        mascara = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(carpeta), mascara) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch", carpeta)
+
+    def leer(self, espera: float):
+        listos, _, _ = select.select([self.fd], [], [], espera)
+        if not listos:
+            return set()
+        try:
+            datos = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return set()
+        nombres = set()
+        i = 0
+        while i < len(datos):
+            _, mascara, _, largo = _CABECERA.unpack_from(datos, i)
+            i += _CABECERA.size
+            if mascara & IN_Q_OVERFLOW:
+                return None
+            nombre = datos[i:i + largo].rstrip(b"\0")
+            i += largo
+            if nombre:
+                nombres.add(os.fsdecode(nombre))
+        return nombres
+
+    def cerrar(self):
+        os.close(self.fd)
+
+
+class _Sondeo:
+    """
+    Compara {nombre: (mtime, tamaño)} entre recorridos de la carpeta.
+    """
+
+    def __init__(self, carpeta: str, extensiones: tuple):
+        self.carpeta = carpeta
+        self.extensiones = extensiones
+        self.foto = self._foto()
+
+    def _foto(self) -> dict:
+        foto = {}
+        try:
+            with os.scandir(self.carpeta) as it:
+                for e in it:
+                    if e.name.lower().endswith(self.extensiones) and e.is_file():
+                        st = e.stat()
+                        foto[e.name] = (st.st_mtime_ns, st.st_size)
+        except OSError as e:
+            log.error("No se pudo leer la carpeta %s: %s", self.carpeta, e)
+        return foto
+
+    def leer(self, espera: float):
+        time.sleep(min(espera, INTERVALO_SONDEO))
+        foto = self._foto()
+        nombres = {n for n in foto.keys() | self.foto.keys() if foto.get(n) != self.foto.get(n)}
+        self.foto = foto
+        return nombres
+
+    def cerrar(self):
+        pass
+
+
+class VigilanteCarpeta:
+    """
+    cambios() entrega, para siempre, conjuntos de nombres de archivo
+    (solo `extensiones`) creados, modificados o borrados en `carpeta`.
+    """
+
+    def __init__(self, carpeta: str, extensiones: tuple = EXTENSIONES, espera: float = ESPERA,
+                 sondeo: bool = False):
+        self.carpeta = carpeta
+        self.extensiones = extensiones
+        self.espera = espera
+        self._fuente = None
+        if not sondeo:
+            try:
+                self._fuente = _Inotify(carpeta)
+                self.modo = "inotify"
+            except (OSError, AttributeError, TypeError) as e:
+                # Sin inotify (Windows, macOS, límite de watches...): sondeo
+                log.debug("inotify no disponible (%s), se usa sondeo", e)
+        if self._fuente is None:
+            self._fuente = _Sondeo(carpeta, extensiones)
+            self.modo = "sondeo"
+
+    def _filtrar(self, nombres: set) -> set:
+        return {n for n in nombres if n.lower().endswith(self.extensiones)}
+
+    def _todos(self) -> set:
+        try:
+            return self._filtrar(set(os.listdir(self.carpeta)))
+        except OSError:
+            return set()
+
+    def cambios(self):
+        while True:
+            nombres = self._fuente.leer(3600)
+            if nombres is None:
+                nombres = self._todos()
+            pendientes = self._filtrar(nombres)
+            if not pendientes:
+                continue
+            # Agrupar la ráfaga: seguir leyendo hasta ESPERA segundos sin novedades
+            inicio = ultimo = time.monotonic()
+            while True:
+                ahora = time.monotonic()
+                if ahora - ultimo >= self.espera or ahora - inicio >= ESPERA_MAXIMA:
+                    break
+                nuevos = self._fuente.leer(self.espera - (ahora - ultimo))
+                if nuevos is None:
+                    nuevos = self._todos()
+                nuevos = self._filtrar(nuevos)
+                if nuevos:
+                    pendientes |= nuevos
+                    ultimo = time.monotonic()
+            log.debug("Cambios en %s: %d archivos", self.carpeta, len(pendientes))
+            yield pendientes
+
+    def cerrar(self):
+        self._fuente.cerrar()